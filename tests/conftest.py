@@ -3,15 +3,62 @@ WisHub Skill Pytest Configuration
 """
 import pytest
 import pytest_asyncio
+import uvloop
 from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
 from wishub_skill.server.app import app
+from wishub_skill.protocol.models import (
+    SkillInvokeRequest,
+    SkillInvokeResponse,
+    SkillRegistrationRequest,
+    SkillLanguage,
+    WorkflowStep,
+    WorkflowDefinition,
+    SkillOrchestrationRequest
+)
 
 
-@pytest_asyncio.fixture
+# 整个测试会话共享一个 ASGI 传输实例，避免每个测试重建
+transport = ASGITransport(app=app)
+
+
+def pytest_asyncio_loop_factories(config, item):
+    """测试会话使用 uvloop 事件循环"""
+    return {"uvloop": uvloop.new_event_loop}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def prebuild_model_schemas():
+    """会话开始时预构建 Pydantic 模型 Schema，避免每个测试首次使用时重建"""
+    for model in (
+        SkillInvokeRequest,
+        SkillInvokeResponse,
+        SkillRegistrationRequest,
+        WorkflowDefinition,
+        SkillOrchestrationRequest,
+    ):
+        model.model_rebuild(force=True)
+
+    # 构造一次实例，预热 pydantic-core 的校验器/序列化器
+    SkillInvokeRequest(skill_id="warmup", inputs={})
+    SkillInvokeResponse(status="success")
+    SkillRegistrationRequest(
+        skill_id="warmup",
+        skill_name="warmup",
+        version="0.0.0",
+        language=SkillLanguage.PYTHON,
+        code=""
+    )
+    workflow = WorkflowDefinition(
+        name="warmup",
+        steps=[WorkflowStep(step_id="s1", skill_id="warmup", inputs={})]
+    )
+    SkillOrchestrationRequest(workflow_id="warmup", workflow=workflow)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client() -> AsyncGenerator[AsyncClient, None]:
-    """创建测试客户端"""
-    transport = ASGITransport(app=app)
+    """创建测试客户端（会话级复用）"""
     async with AsyncClient(
         transport=transport,
         base_url="http://test"
@@ -21,22 +68,30 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
 
 @pytest.fixture
 def sample_skill_invoke_request():
-    """示例 Skill 调用请求"""
-    return {
-        "skill_id": "skill_custom",
-        "inputs": {"name": "test"},
-        "timeout": 30
-    }
+    """示例 Skill 调用请求（已知合法数据，model_construct 跳过校验）"""
+    return SkillInvokeRequest.model_construct(
+        skill_id="skill_custom",
+        skill_version=None,
+        inputs={"name": "test"},
+        timeout=30,
+        is_async=False
+    )
 
 
 @pytest.fixture
 def sample_skill_registration_request():
-    """示例 Skill 注册请求"""
-    return {
-        "skill_id": "skill_custom",
-        "skill_name": "自定义技能",
-        "version": "1.0.0",
-        "language": "python",
-        "code": "ZGVmIGV4ZWN1dGUoaW5wdXRzKToKICAgIHJldHVybiB7InJlc3VsdCI6ICJoZWxsbyJ9",
-        "timeout": 30
-    }
+    """示例 Skill 注册请求（已知合法数据，model_construct 跳过校验）"""
+    return SkillRegistrationRequest.model_construct(
+        skill_id="skill_custom",
+        skill_name="自定义技能",
+        description=None,
+        version="1.0.0",
+        language=SkillLanguage.PYTHON,
+        code="ZGVmIGV4ZWN1dGUoaW5wdXRzKToKICAgIHJldHVybiB7InJlc3VsdCI6ICJoZWxsbyJ9",
+        dependencies=None,
+        input_schema=None,
+        output_schema=None,
+        timeout=30,
+        author=None,
+        license=None
+    )
@@ -8,61 +8,40 @@ from wishub_skill.protocol.models import SkillInvokeRequest
 
 
 @pytest.mark.asyncio
-async def test_invoke_skill_success(client: AsyncClient):
-    """测试成功的 Skill 调用"""
+@pytest.mark.parametrize(
+    "skill_id,is_async,inputs",
+    [
+        # 成功的同步调用
+        ("test_skill_001", False, {"symptoms": ["口渴", "多尿"], "patient_age": 45}),
+        # 调用不存在的 Skill
+        ("nonexistent_skill", False, {"test": "value"}),
+        # 异步调用
+        ("test_skill_001", True, {"test": "value"}),
+    ],
+    ids=["success", "not_found", "async"]
+)
+async def test_invoke_skill(
+    client: AsyncClient,
+    skill_id: str,
+    is_async: bool,
+    inputs: dict
+):
+    """测试 Skill 调用（同步/不存在/异步）"""
     request = SkillInvokeRequest(
-        skill_id="test_skill_001",
-        inputs={
-            "symptoms": ["口渴", "多尿"],
-            "patient_age": 45
-        },
+        skill_id=skill_id,
+        inputs=inputs,
         timeout=30,
-        is_async=False
+        is_async=is_async
     )
 
     response = await client.post(
         "/api/v1/skill/invoke",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
+        content=request.model_dump_json(),
+        headers={
+            "X-API-Key": "test_key",
+            "Content-Type": "application/json"
+        }
     )
 
     # 由于我们没有真实的数据库，响应可能是 404 或 500
     assert response.status_code in [200, 404, 500]
-
-
-@pytest.mark.asyncio
-async def test_invoke_skill_not_found(client: AsyncClient):
-    """测试调用不存在的 Skill"""
-    request = SkillInvokeRequest(
-        skill_id="nonexistent_skill",
-        inputs={"test": "value"},
-        timeout=30,
-        is_async=False
-    )
-
-    response = await client.post(
-        "/api/v1/skill/invoke",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
-    )
-
-    assert response.status_code in [200, 500]
-
-
-@pytest.mark.asyncio
-async def test_invoke_skill_async(client: AsyncClient):
-    """测试异步调用 Skill"""
-    request = SkillInvokeRequest(
-        skill_id="test_skill_001",
-        inputs={"test": "value"},
-        timeout=30,
-        is_async=True
-    )
-
-    response = await client.post(
-        "/api/v1/skill/invoke",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
-    )
-
-    assert response.status_code in [200, 500]
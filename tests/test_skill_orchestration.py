@@ -42,8 +42,11 @@ async def test_orchestrate_sequential(client: AsyncClient):
 
     response = await client.post(
         "/api/v1/skill/orchestrate",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
+        content=request.model_dump_json(),
+        headers={
+            "X-API-Key": "test_key",
+            "Content-Type": "application/json"
+        }
     )
 
     # 由于我们没有真实的数据库，响应可能是 500
@@ -79,8 +82,11 @@ async def test_orchestrate_cyclic_dependency(client: AsyncClient):
 
     response = await client.post(
         "/api/v1/skill/orchestrate",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
+        content=request.model_dump_json(),
+        headers={
+            "X-API-Key": "test_key",
+            "Content-Type": "application/json"
+        }
     )
 
     assert response.status_code in [200, 500]
@@ -10,12 +10,8 @@ from wishub_skill.protocol.models import (
     SkillLanguage
 )
 
-
-@pytest.mark.asyncio
-async def test_register_skill_success(client: AsyncClient):
-    """测试成功的 Skill 注册"""
-    # 创建示例代码
-    code = """
+# 示例代码只在模块导入时编码一次
+_SAMPLE_CODE = """
 def execute(inputs):
     symptoms = inputs.get("symptoms", [])
     patient_age = inputs.get("patient_age", 0)
@@ -24,8 +20,12 @@ def execute(inputs):
         "confidence": 0.85
     }
 """
-    code_b64 = base64.b64encode(code.encode('utf-8')).decode('utf-8')
+_SAMPLE_CODE_B64 = base64.b64encode(_SAMPLE_CODE.encode('utf-8')).decode('utf-8')
+
 
+@pytest.mark.asyncio
+async def test_register_skill_success(client: AsyncClient):
+    """测试成功的 Skill 注册"""
     # 创建注册请求
     request = SkillRegistrationRequest(
         skill_id="test_skill_001",
@@ -33,7 +33,7 @@ def execute(inputs):
         description="这是一个测试技能",
         version="1.0.0",
         language=SkillLanguage.PYTHON,
-        code=code_b64,
+        code=_SAMPLE_CODE_B64,
         input_schema={
             "type": "object",
             "properties": {
@@ -57,8 +57,11 @@ def execute(inputs):
     # 在实际环境中需要使用 mock
     response = await client.post(
         "/api/v1/skill/register",
-        json=request.model_dump(),
-        headers={"X-API-Key": "test_key"}
+        content=request.model_dump_json(),
+        headers={
+            "X-API-Key": "test_key",
+            "Content-Type": "application/json"
+        }
     )
 
     # 由于我们没有真实的数据库，响应可能是 500
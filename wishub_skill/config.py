@@ -1,28 +1,48 @@
 """
 WisHub Skill Configuration
 """
-from pydantic_settings import BaseSettings
-from typing import Optional
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List, Literal, Optional
 
 
 class Settings(BaseSettings):
     """应用配置"""
 
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        frozen=True
+    )
+
     # 应用配置
     APP_NAME: str = "wishub-skill"
     APP_VERSION: str = "0.1.0"
-    APP_ENV: str = "development"
+    APP_ENV: Literal["development", "staging", "production"] = "development"
     DEBUG: bool = False
 
     # API 配置
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     API_PREFIX: str = "/api/v1"
+    WORKERS: int = 1
+
+    # 编排配置：单进程内同时运行的工作流步骤（容器）上限
+    MAX_PARALLEL_STEPS: int = 10
+
+    # 异步调用任务池的 worker 数
+    TASK_POOL_WORKERS: int = 4
+
+    # 每种语言预热的常驻容器数（消除容器冷启动开销）
+    WARM_POOL_SIZE: int = 2
 
     # 认证配置
     AUTH_REQUIRED: bool = True
     AUTH_HEADER: str = "X-API-Key"
 
+    # CORS 配置
+    CORS_ORIGINS: List[str] = ["*"]
+
     # PostgreSQL 配置
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
@@ -55,11 +75,13 @@ class Settings(BaseSettings):
 
     # 日志配置
     LOG_LEVEL: str = "INFO"
-    LOG_FORMAT: str = "json"
+    LOG_FORMAT: Literal["json", "console"] = "json"
+
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+@lru_cache
+def get_settings() -> Settings:
+    """获取应用配置（进程内只解析一次环境变量 / .env）"""
+    return Settings()
 
 
-settings = Settings()
+settings = get_settings()
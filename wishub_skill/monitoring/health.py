@@ -1,15 +1,21 @@
 """
 健康检查模块
 """
+import asyncio
+import time
 from enum import Enum
 from typing import Dict, Any
 import httpx
+from sqlalchemy import text
 
 from wishub_skill.monitoring.metrics import update_connection_status
 from wishub_skill.monitoring.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# 预编译的探活语句
+_PING = text("SELECT 1")
+
 
 class HealthStatus(str, Enum):
     """健康状态"""
@@ -18,26 +24,27 @@ class HealthStatus(str, Enum):
     DEGRADED = "degraded"
 
 
-class DependencyHealth:
-    """依赖服务健康状态"""
+# 预先取出状态字符串，避免热路径上的 .value 属性访问
+# 单项依赖检查的超时上限（秒）
+CHECK_TIMEOUT_SECONDS = 2.0
+
+_HEALTHY = HealthStatus.HEALTHY.value
+_UNHEALTHY = HealthStatus.UNHEALTHY.value
+_DEGRADED = HealthStatus.DEGRADED.value
 
-    def __init__(self, name: str, status: HealthStatus,
-                 latency_ms: float = 0, message: str = ""):
-        self.name = name
-        self.status = status
-        self.latency_ms = latency_ms
-        self.message = message
 
-    def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return {
-            "status": self.status.value,
-            "latency_ms": self.latency_ms,
-            "message": self.message
-        }
+def _health_entry(name: str, status: str,
+                  latency_ms: float = 0, message: str = "") -> Dict[str, Any]:
+    """构建健康检查结果条目（直接返回待序列化的字典，省去对象分配）"""
+    return {
+        "name": name,
+        "status": status,
+        "latency_ms": latency_ms,
+        "message": message
+    }
 
 
-async def check_postgres(db_session) -> DependencyHealth:
+async def check_postgres(db_session) -> Dict[str, Any]:
     """
     检查 PostgreSQL 健康状态
 
@@ -45,37 +52,34 @@ async def check_postgres(db_session) -> DependencyHealth:
         db_session: 数据库会话
 
     Returns:
-        DependencyHealth 实例
+        健康检查结果字典
     """
-    import time
-
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     try:
         # 执行简单查询
-        result = await db_session.execute("SELECT 1")
-        result.fetchone()
-        latency_ms = (time.time() - start_time) * 1000
+        await db_session.scalar(_PING)
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         update_connection_status("postgres", True)
         logger.info("PostgreSQL health check passed", latency_ms=latency_ms)
 
-        return DependencyHealth(
+        return _health_entry(
             name="postgres",
-            status=HealthStatus.HEALTHY,
+            status=_HEALTHY,
             latency_ms=latency_ms
         )
     except Exception as e:
         update_connection_status("postgres", False)
         logger.error("PostgreSQL health check failed", error=str(e))
 
-        return DependencyHealth(
+        return _health_entry(
             name="postgres",
-            status=HealthStatus.UNHEALTHY,
+            status=_UNHEALTHY,
             message=str(e)
         )
 
 
-async def check_minio(minio_client, bucket_name: str) -> DependencyHealth:
+async def check_minio(minio_client, bucket_name: str) -> Dict[str, Any]:
     """
     检查 MinIO 健康状态
 
@@ -84,36 +88,34 @@ async def check_minio(minio_client, bucket_name: str) -> DependencyHealth:
         bucket_name: 存储桶名称
 
     Returns:
-        DependencyHealth 实例
+        健康检查结果字典
     """
-    import time
-
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     try:
-        # 检查存储桶是否存在
-        minio_client.bucket_exists(bucket_name)
-        latency_ms = (time.time() - start_time) * 1000
+        # 检查存储桶是否存在（同步客户端，放入线程池避免阻塞事件循环）
+        await asyncio.to_thread(minio_client.bucket_exists, bucket_name)
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         update_connection_status("minio", True)
         logger.info("MinIO health check passed", latency_ms=latency_ms)
 
-        return DependencyHealth(
+        return _health_entry(
             name="minio",
-            status=HealthStatus.HEALTHY,
+            status=_HEALTHY,
             latency_ms=latency_ms
         )
     except Exception as e:
         update_connection_status("minio", False)
         logger.error("MinIO health check failed", error=str(e))
 
-        return DependencyHealth(
+        return _health_entry(
             name="minio",
-            status=HealthStatus.UNHEALTHY,
+            status=_UNHEALTHY,
             message=str(e)
         )
 
 
-async def check_elasticsearch(es_client, index: str) -> DependencyHealth:
+async def check_elasticsearch(es_client, index: str) -> Dict[str, Any]:
     """
     检查 Elasticsearch 健康状态
 
@@ -122,24 +124,22 @@ async def check_elasticsearch(es_client, index: str) -> DependencyHealth:
         index: 索引名称
 
     Returns:
-        DependencyHealth 实例
+        健康检查结果字典
     """
-    import time
-
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     try:
-        # 检查集群健康状态
-        health = es_client.cluster.health()
-        latency_ms = (time.time() - start_time) * 1000
+        # 检查集群健康状态（同步客户端，放入线程池避免阻塞事件循环）
+        health = await asyncio.to_thread(es_client.cluster.health)
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         if health["status"] in ("green", "yellow"):
             update_connection_status("elasticsearch", True)
             logger.info("Elasticsearch health check passed",
                        status=health["status"], latency_ms=latency_ms)
 
-            return DependencyHealth(
+            return _health_entry(
                 name="elasticsearch",
-                status=HealthStatus.HEALTHY,
+                status=_HEALTHY,
                 latency_ms=latency_ms
             )
         else:
@@ -147,9 +147,9 @@ async def check_elasticsearch(es_client, index: str) -> DependencyHealth:
             logger.warning("Elasticsearch health degraded",
                           status=health["status"])
 
-            return DependencyHealth(
+            return _health_entry(
                 name="elasticsearch",
-                status=HealthStatus.DEGRADED,
+                status=_DEGRADED,
                 latency_ms=latency_ms,
                 message=f"Cluster status: {health['status']}"
             )
@@ -157,14 +157,14 @@ async def check_elasticsearch(es_client, index: str) -> DependencyHealth:
         update_connection_status("elasticsearch", False)
         logger.error("Elasticsearch health check failed", error=str(e))
 
-        return DependencyHealth(
+        return _health_entry(
             name="elasticsearch",
-            status=HealthStatus.UNHEALTHY,
+            status=_UNHEALTHY,
             message=str(e)
         )
 
 
-async def check_redis(redis_client) -> DependencyHealth:
+async def check_redis(redis_client) -> Dict[str, Any]:
     """
     检查 Redis 健康状态
 
@@ -172,36 +172,34 @@ async def check_redis(redis_client) -> DependencyHealth:
         redis_client: Redis 客户端
 
     Returns:
-        DependencyHealth 实例
+        健康检查结果字典
     """
-    import time
-
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     try:
         # 执行 PING 命令
         await redis_client.ping()
-        latency_ms = (time.time() - start_time) * 1000
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         update_connection_status("redis", True)
         logger.info("Redis health check passed", latency_ms=latency_ms)
 
-        return DependencyHealth(
+        return _health_entry(
             name="redis",
-            status=HealthStatus.HEALTHY,
+            status=_HEALTHY,
             latency_ms=latency_ms
         )
     except Exception as e:
         update_connection_status("redis", False)
         logger.error("Redis health check failed", error=str(e))
 
-        return DependencyHealth(
+        return _health_entry(
             name="redis",
-            status=HealthStatus.UNHEALTHY,
+            status=_UNHEALTHY,
             message=str(e)
         )
 
 
-async def check_docker(docker_client) -> DependencyHealth:
+async def check_docker(docker_client) -> Dict[str, Any]:
     """
     检查 Docker 健康状态
 
@@ -209,31 +207,29 @@ async def check_docker(docker_client) -> DependencyHealth:
         docker_client: Docker 客户端
 
     Returns:
-        DependencyHealth 实例
+        健康检查结果字典
     """
-    import time
-
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     try:
-        # 检查 Docker 版本
-        docker_client.version()
-        latency_ms = (time.time() - start_time) * 1000
+        # 检查 Docker 版本（同步客户端，放入线程池避免阻塞事件循环）
+        await asyncio.to_thread(docker_client.version)
+        latency_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
 
         update_connection_status("docker", True)
         logger.info("Docker health check passed", latency_ms=latency_ms)
 
-        return DependencyHealth(
+        return _health_entry(
             name="docker",
-            status=HealthStatus.HEALTHY,
+            status=_HEALTHY,
             latency_ms=latency_ms
         )
     except Exception as e:
         update_connection_status("docker", False)
         logger.error("Docker health check failed", error=str(e))
 
-        return DependencyHealth(
+        return _health_entry(
             name="docker",
-            status=HealthStatus.UNHEALTHY,
+            status=_UNHEALTHY,
             message=str(e)
         )
 
@@ -264,35 +260,47 @@ async def perform_health_checks(
     """
     logger.info("starting_health_checks")
 
-    results = {}
-
-    # 检查 PostgreSQL
-    postgres_health = await check_postgres(db_session)
-    results[postgres_health.name] = postgres_health.to_dict()
+    # 各依赖检查相互独立，并发执行以缩短总耗时
+    checks = [("postgres", check_postgres(db_session))]
 
-    # 检查 MinIO
     if minio_client:
-        minio_health = await check_minio(minio_client, minio_bucket)
-        results[minio_health.name] = minio_health.to_dict()
+        checks.append(("minio", check_minio(minio_client, minio_bucket)))
 
-    # 检查 Elasticsearch
     if es_client:
-        es_health = await check_elasticsearch(es_client, es_index)
-        results[es_health.name] = es_health.to_dict()
+        checks.append(("elasticsearch", check_elasticsearch(es_client, es_index)))
 
-    # 检查 Redis
     if redis_client:
-        redis_health = await check_redis(redis_client)
-        results[redis_health.name] = redis_health.to_dict()
+        checks.append(("redis", check_redis(redis_client)))
 
-    # 检查 Docker
     if docker_client:
-        docker_health = await check_docker(docker_client)
-        results[docker_health.name] = docker_health.to_dict()
+        checks.append(("docker", check_docker(docker_client)))
+
+    # 每项检查设独立超时：单个依赖挂起时 /health 仍能及时返回，
+    # 不会拖垮整体探测
+    health_results = await asyncio.gather(
+        *(asyncio.wait_for(coro, timeout=CHECK_TIMEOUT_SECONDS) for _, coro in checks),
+        return_exceptions=True
+    )
+
+    results = {}
+    for (name, _), health in zip(checks, health_results):
+        if isinstance(health, asyncio.TimeoutError):
+            health = _health_entry(
+                name=name,
+                status=_UNHEALTHY,
+                message=f"健康检查超时（>{CHECK_TIMEOUT_SECONDS}s）"
+            )
+        elif isinstance(health, Exception):
+            health = _health_entry(
+                name=name,
+                status=_UNHEALTHY,
+                message=str(health)
+            )
+        results[health.pop("name")] = health
 
     # 确定整体健康状态
     all_healthy = all(
-        dep["status"] == HealthStatus.HEALTHY.value
+        dep["status"] == _HEALTHY
         for dep in results.values()
     )
 
@@ -314,11 +322,13 @@ def get_overall_status(dependencies: Dict[str, Dict[str, Any]]) -> HealthStatus:
     Returns:
         整体健康状态
     """
-    statuses = [dep["status"] for dep in dependencies.values()]
-
-    if all(s == HealthStatus.HEALTHY.value for s in statuses):
-        return HealthStatus.HEALTHY
-    elif any(s == HealthStatus.UNHEALTHY.value for s in statuses):
-        return HealthStatus.UNHEALTHY
-    else:
-        return HealthStatus.DEGRADED
+    # 单次遍历：遇到 unhealthy 立即返回，其余非 healthy 记为 degraded
+    degraded = False
+    for dep in dependencies.values():
+        status = dep["status"]
+        if status == _UNHEALTHY:
+            return HealthStatus.UNHEALTHY
+        if status != _HEALTHY:
+            degraded = True
+
+    return HealthStatus.DEGRADED if degraded else HealthStatus.HEALTHY
@@ -3,12 +3,19 @@
 """
 import logging
 import sys
+from functools import lru_cache
 from typing import Any
 
+import orjson
 import structlog
 from structlog.types import EventDict, Processor
 
 
+def _orjson_dumps(value: Any, *, default: Any = None, **_: Any) -> str:
+    """orjson 序列化器（比标准库 json 快数倍）"""
+    return orjson.dumps(value, default=default).decode()
+
+
 def add_app_context(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
     """添加应用上下文信息"""
     event_dict["app"] = "wishub-skill"
@@ -23,11 +30,14 @@ def setup_logging(log_level: str = "INFO", json_format: bool = True) -> None:
         log_level: 日志级别 (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         json_format: 是否使用 JSON 格式
     """
+    # 日志级别只解析一次
+    level_int = getattr(logging, log_level.upper(), logging.INFO)
+
     # 配置标准库 logging
     logging.basicConfig(
         format="%(message)s",
         stream=sys.stdout,
-        level=getattr(logging, log_level.upper(), logging.INFO),
+        level=level_int,
     )
 
     # 配置 structlog 处理器
@@ -38,22 +48,29 @@ def setup_logging(log_level: str = "INFO", json_format: bool = True) -> None:
         structlog.stdlib.add_log_level,
         # 添加应用上下文
         add_app_context,
-        # 添加调用者信息（仅在 DEBUG 模式）
-        structlog.processors.CallsiteParameterAdder(
-            [
-                structlog.processors.CallsiteParameter.FILENAME,
-                structlog.processors.CallsiteParameter.FUNC_NAME,
-                structlog.processors.CallsiteParameter.LINENO,
-            ]
-        ) if log_level.upper() == "DEBUG" else lambda logger, method_name, event_dict: event_dict,
+    ]
+
+    # 添加调用者信息（仅在 DEBUG 模式，非 DEBUG 时不插入任何处理器）
+    if level_int == logging.DEBUG:
+        processors.append(
+            structlog.processors.CallsiteParameterAdder(
+                [
+                    structlog.processors.CallsiteParameter.FILENAME,
+                    structlog.processors.CallsiteParameter.FUNC_NAME,
+                    structlog.processors.CallsiteParameter.LINENO,
+                ]
+            )
+        )
+
+    processors.extend([
         # 异常信息格式化
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
-    ]
+    ])
 
     # 根据格式选择输出处理器
     if json_format:
-        processors.append(structlog.processors.JSONRenderer())
+        processors.append(structlog.processors.JSONRenderer(serializer=_orjson_dumps))
     else:
         processors.append(structlog.dev.ConsoleRenderer(colors=True))
 
@@ -67,9 +84,10 @@ def setup_logging(log_level: str = "INFO", json_format: bool = True) -> None:
     )
 
 
+@lru_cache(maxsize=None)
 def get_logger(name: str) -> structlog.stdlib.BoundLogger:
     """
-    获取结构化日志记录器
+    获取结构化日志记录器（按名称缓存，重复调用返回同一实例）
 
     Args:
         name: 日志记录器名称
@@ -1,6 +1,8 @@
 """
 Prometheus 指标收集
 """
+from functools import lru_cache
+
 from prometheus_client import Counter, Histogram, Gauge, Info
 from prometheus_fastapi_instrumentator import Instrumentator
 from fastapi import FastAPI
@@ -111,6 +113,48 @@ app_info = Info(
     "Application information"
 )
 
+# 服务名 → 连接状态 Gauge 映射（构建一次，热路径直接查表）
+_CONNECTION_GAUGES = {
+    "postgres": postgres_connection_status,
+    "minio": minio_connection_status,
+    "elasticsearch": elasticsearch_connection_status,
+    "redis": redis_connection_status,
+    "docker": docker_connection_status,
+}
+
+
+# 缓存 labels() 返回的子指标，热路径只剩 inc()/observe() 调用
+@lru_cache(maxsize=4096)
+def _invocation_counter(skill_id: str, language: str, status: str):
+    return skill_invocations_total.labels(
+        skill_id=skill_id,
+        language=language,
+        status=status
+    )
+
+
+@lru_cache(maxsize=4096)
+def _invocation_histogram(skill_id: str, language: str):
+    return skill_invocation_duration_seconds.labels(
+        skill_id=skill_id,
+        language=language
+    )
+
+
+@lru_cache(maxsize=256)
+def _registration_counter(language: str, status: str):
+    return skill_registrations_total.labels(language=language, status=status)
+
+
+@lru_cache(maxsize=256)
+def _cache_counter(operation: str, status: str):
+    return cache_operations_total.labels(operation=operation, status=status)
+
+
+@lru_cache(maxsize=256)
+def _storage_counter(operation: str, status: str):
+    return storage_operations_total.labels(operation=operation, status=status)
+
 
 def setup_metrics(app: FastAPI) -> Instrumentator:
     """
@@ -126,6 +170,9 @@ def setup_metrics(app: FastAPI) -> Instrumentator:
     instrumentator = Instrumentator(
         should_group_status_codes=False,
         should_ignore_untemplated=True,
+        # 不统计 in-progress 请求：每个请求省去两次带标签的 Gauge 操作
+        should_instrument_requests_inprogress=False,
+        inprogress_labels=False,
         excluded_handlers=["/metrics", "/health", "/"],
         env_var_name="ENABLE_METRICS",
     )
@@ -146,15 +193,8 @@ def record_skill_invocation(skill_id: str, language: str, status: str,
         status: 调用状态
         duration: 调用耗时（秒）
     """
-    skill_invocations_total.labels(
-        skill_id=skill_id,
-        language=language,
-        status=status
-    ).inc()
-    skill_invocation_duration_seconds.labels(
-        skill_id=skill_id,
-        language=language
-    ).observe(duration)
+    _invocation_counter(skill_id, language, status).inc()
+    _invocation_histogram(skill_id, language).observe(duration)
 
 
 def record_skill_registration(language: str, status: str) -> None:
@@ -165,7 +205,7 @@ def record_skill_registration(language: str, status: str) -> None:
         language: 编程语言
         status: 注册状态
     """
-    skill_registrations_total.labels(language=language, status=status).inc()
+    _registration_counter(language, status).inc()
 
 
 def update_docker_containers(active_count: int) -> None:
@@ -191,7 +231,7 @@ def record_cache_operation(operation: str, status: str) -> None:
         operation: 操作类型
         status: 操作状态
     """
-    cache_operations_total.labels(operation=operation, status=status).inc()
+    _cache_counter(operation, status).inc()
 
 
 def record_storage_operation(operation: str, status: str) -> None:
@@ -202,7 +242,7 @@ def record_storage_operation(operation: str, status: str) -> None:
         operation: 操作类型
         status: 操作状态
     """
-    storage_operations_total.labels(operation=operation, status=status).inc()
+    _storage_counter(operation, status).inc()
 
 
 def update_connection_status(service: str, connected: bool) -> None:
@@ -213,15 +253,9 @@ def update_connection_status(service: str, connected: bool) -> None:
         service: 服务名称 (postgres, minio, elasticsearch, redis, docker)
         connected: 是否连接
     """
-    status_gauge = {
-        "postgres": postgres_connection_status,
-        "minio": minio_connection_status,
-        "elasticsearch": elasticsearch_connection_status,
-        "redis": redis_connection_status,
-        "docker": docker_connection_status,
-    }.get(service)
+    status_gauge = _CONNECTION_GAUGES.get(service)
 
-    if status_gauge:
+    if status_gauge is not None:
         status_gauge.set(1 if connected else 0)
 
 
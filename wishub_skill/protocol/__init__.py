@@ -7,6 +7,7 @@ from wishub_skill.protocol.models import (
     SkillInvokeRequest,
     SkillInvokeResponse,
     SkillRegistrationRequest,
+    SkillRegistrationConfirmRequest,
     SkillRegistrationResponse,
     SkillDiscoveryRequest,
     SkillInfo,
@@ -23,6 +24,7 @@ __all__ = [
     "SkillInvokeRequest",
     "SkillInvokeResponse",
     "SkillRegistrationRequest",
+    "SkillRegistrationConfirmRequest",
     "SkillRegistrationResponse",
     "SkillDiscoveryRequest",
     "SkillInfo",
@@ -110,6 +110,62 @@ class SkillRegistrationRequest(BaseModel):
         le=300,
         description="默认超时时间（秒）"
     )
+    memoizable: bool = Field(
+        default=False,
+        description="是否幂等（相同输入的结果可缓存复用）"
+    )
+    author: Optional[str] = Field(
+        default=None,
+        description="作者"
+    )
+    license: Optional[str] = Field(
+        default=None,
+        description="许可证"
+    )
+    category: Optional[str] = Field(
+        default=None,
+        description="分类"
+    )
+
+
+class SkillRegistrationConfirmRequest(BaseModel):
+    """Skill 注册确认请求（代码已通过预签名 URL 直传到存储）"""
+    skill_id: str = Field(..., description="Skill ID (唯一)")
+    skill_name: str = Field(..., description="Skill 名称")
+    description: Optional[str] = Field(
+        default=None,
+        description="Skill 描述"
+    )
+    version: str = Field(
+        ...,
+        description="版本号 (SemVer 格式: x.y.z)"
+    )
+    language: SkillLanguage = Field(
+        ...,
+        description="编程语言"
+    )
+    dependencies: Optional[List[str]] = Field(
+        default=None,
+        description="依赖列表"
+    )
+    input_schema: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="输入 Schema"
+    )
+    output_schema: Optional[Dict[str, Any]] = Field(
+        default=None,
+        description="输出 Schema"
+    )
+    timeout: int = Field(
+        default=30,
+        ge=1,
+        le=300,
+        description="默认超时时间（秒）"
+    )
+    memoizable: bool = Field(
+        default=False,
+        description="是否幂等（相同输入的结果可缓存复用）"
+    )
     author: Optional[str] = Field(
         default=None,
         description="作者"
@@ -118,6 +174,10 @@ class SkillRegistrationRequest(BaseModel):
         default=None,
         description="许可证"
     )
+    category: Optional[str] = Field(
+        default=None,
+        description="分类"
+    )
 
 
 class SkillRegistrationResponse(BaseModel):
@@ -308,3 +368,23 @@ class HealthCheckResponse(BaseModel):
         default_factory=dict,
         description="依赖状态"
     )
+
+
+# 导入时预构建所有模型的核心 schema，避免首个请求承担惰性构建开销
+for _model in (
+    SkillInvokeRequest,
+    SkillInvokeResponse,
+    SkillRegistrationRequest,
+    SkillRegistrationConfirmRequest,
+    SkillRegistrationResponse,
+    SkillDiscoveryRequest,
+    SkillDiscoveryResponse,
+    SkillInfo,
+    WorkflowStep,
+    WorkflowDefinition,
+    SkillOrchestrationRequest,
+    SkillOrchestrationResponse,
+    HealthCheckResponse,
+):
+    _model.model_rebuild(force=True)
+del _model
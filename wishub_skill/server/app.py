@@ -1,21 +1,29 @@
 """
 WisHub Skill Main Application
 """
-from fastapi import FastAPI
+import os
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
 from contextlib import asynccontextmanager
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest, CollectorRegistry, REGISTRY, CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
 
 from wishub_skill.config import settings
-from wishub_skill.protocol.models import HealthCheckResponse
+from wishub_skill.server.responses import ORJSONResponse
 from wishub_skill.server.routes import (
     register_router,
     invoke_router,
     discovery_router,
     orchestration_router
 )
-from wishub_skill.server.db_session import init_db
+from wishub_skill.server.db_session import init_db, AsyncSessionLocal
+from wishub_skill.server.storage import get_minio_client
+from wishub_skill.server.search import get_es_client
+from wishub_skill.server.cache import get_redis_client
 from wishub_skill.monitoring.logging_config import setup_logging, get_logger
 from wishub_skill.monitoring.metrics import setup_metrics, set_app_info
 from wishub_skill.monitoring.health import perform_health_checks, get_overall_status
@@ -50,16 +58,32 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error("database_initialization_failed", error=str(e))
 
+    # OpenAPI 规范在启动时序列化一次，之后按字节缓存返回
+    app.state.openapi_bytes = orjson.dumps(app.openapi())
+
+    # 预热依赖服务客户端单例，首个请求不再承担建连开销
+    app.state.minio_client = get_minio_client()
+    app.state.es_client = get_es_client()
+    app.state.redis_client = get_redis_client()
+
     # 检查运行时引擎
     from wishub_skill.server.runtime import runtime_engine
     if await runtime_engine.health_check():
         logger.info("runtime_engine_healthy")
+        # 预热常驻容器池，首次调用不再承担容器冷启动
+        await runtime_engine.warm_up()
     else:
         logger.warning("runtime_engine_unavailable")
 
+    # 启动异步调用任务池
+    from wishub_skill.server.task_pool import task_pool
+    await task_pool.start()
+
     yield
 
     # 关闭
+    await task_pool.stop()
+    await runtime_engine.shutdown_warm_pool()
     logger.info("shutting_down", app_name=settings.APP_NAME)
 
 
@@ -70,13 +94,16 @@ app = FastAPI(
     description="WisHub Skill Protocol Server - 技能注册、发现、调用和编排",
     docs_url="/docs",
     redoc_url="/redoc",
+    # orjson 序列化响应体，比默认 JSONResponse 快数倍
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# CORS 中间件
+# CORS 中间件：收紧 allow_origins 后浏览器可以缓存预检结果，
+# 减少打到服务端的 OPTIONS 请求
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -85,6 +112,27 @@ app.add_middleware(
 # 设置 Prometheus 指标
 setup_metrics(app)
 
+
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
+    """
+    未预期异常的兜底处理
+
+    路由处理器只捕获可预期的异常类型（数据库、IO、参数错误等），
+    其余异常统一在这里转换为结构化错误响应。
+    """
+    logger.error("unhandled_exception", path=request.url.path, error=str(exc))
+    return ORJSONResponse(
+        {
+            "status": "error",
+            "error": {
+                "code": "SERVER_999",
+                "details": str(exc)
+            }
+        },
+        status_code=500
+    )
+
 # 注册路由
 app.include_router(register_router, prefix=settings.API_PREFIX)
 app.include_router(invoke_router, prefix=settings.API_PREFIX)
@@ -95,14 +143,15 @@ app.include_router(orchestration_router, prefix=settings.API_PREFIX)
 @app.get("/", tags=["Root"])
 async def root():
     """根路径"""
-    return {
+    # 直接返回 Response 对象，跳过 jsonable_encoder 遍历
+    return ORJSONResponse({
         "name": settings.APP_NAME,
         "version": settings.APP_VERSION,
         "status": "running"
-    }
+    })
 
 
-@app.get("/health", response_model=HealthCheckResponse, tags=["Health"])
+@app.get("/health", tags=["Health"])
 async def health_check():
     """
     健康检查
@@ -114,32 +163,29 @@ async def health_check():
     - Redis 缓存
     - Docker 运行时
     """
-    # 获取各服务客户端
-    from wishub_skill.server.db_session import get_async_session
-    from wishub_skill.server.storage import get_minio_client
-    from wishub_skill.server.search import get_es_client
-    from wishub_skill.server.cache import get_redis_client
     from wishub_skill.server.runtime import get_docker_client
 
-    # 执行健康检查
-    dependencies = await perform_health_checks(
-        db_session=await get_async_session().__anext__(),
-        minio_client=get_minio_client(),
-        minio_bucket=settings.MINIO_BUCKET,
-        es_client=get_es_client(),
-        es_index=settings.ELASTICSEARCH_INDEX,
-        redis_client=get_redis_client(),
-        docker_client=get_docker_client()
-    )
+    # 执行健康检查（客户端均为进程级单例，不在请求路径上重建）
+    async with AsyncSessionLocal() as db_session:
+        dependencies = await perform_health_checks(
+            db_session=db_session,
+            minio_client=get_minio_client(),
+            minio_bucket=settings.MINIO_BUCKET,
+            es_client=get_es_client(),
+            es_index=f"{settings.ES_INDEX_PREFIX}-skills",
+            redis_client=get_redis_client(),
+            docker_client=get_docker_client()
+        )
 
     # 获取整体状态
     overall_status = get_overall_status(dependencies)
 
-    return HealthCheckResponse(
-        status=overall_status.value,
-        version=settings.APP_VERSION,
-        dependencies=dependencies
-    )
+    # 直接返回 Response 对象，跳过 response_model 的二次校验和编码
+    return ORJSONResponse({
+        "status": overall_status.value,
+        "version": settings.APP_VERSION,
+        "dependencies": dependencies
+    })
 
 
 @app.get("/metrics", tags=["Monitoring"])
@@ -158,20 +204,39 @@ async def metrics():
     - 各服务连接状态
     - 应用信息
     """
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    # 多进程部署（gunicorn 多 worker）下聚合各进程的指标文件
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    # 指标遍历/编码是纯 CPU 的同步工作，放入线程池避免阻塞事件循环
+    content = await run_in_threadpool(generate_latest, registry)
+    return Response(content=content, media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get(f"{settings.API_PREFIX}/openapi.json", tags=["API"])
 async def get_openapi():
-    """获取 OpenAPI 规范"""
-    return app.openapi()
+    """获取 OpenAPI 规范（启动时序列化，按字节缓存返回）"""
+    content = getattr(app.state, "openapi_bytes", None)
+    if content is None:
+        # lifespan 未运行（如测试环境）时按需序列化一次
+        content = orjson.dumps(app.openapi())
+        app.state.openapi_bytes = content
+    return Response(content=content, media_type="application/json")
 
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "main:app",
+        "wishub_skill.server.app:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.DEBUG
+        # uvloop 事件循环 + httptools HTTP 解析器，吞吐明显高于纯 Python 实现
+        loop="uvloop",
+        http="httptools",
+        workers=settings.WORKERS,
+        # reload 的文件监视有持续开销，只在开发环境打开
+        reload=settings.DEBUG and settings.APP_ENV == "development"
     )
@@ -0,0 +1,27 @@
+"""
+Cache Client (Redis)
+"""
+import logging
+from functools import lru_cache
+
+from redis import asyncio as aioredis
+
+from wishub_skill.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_redis_client() -> aioredis.Redis:
+    """
+    获取进程级 Redis 客户端单例
+
+    redis-py 异步客户端内部维护连接池，进程内复用同一个实例即可，
+    避免每次请求重建连接。
+    """
+    return aioredis.Redis(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=settings.REDIS_DB,
+        password=settings.REDIS_PASSWORD,
+    )
@@ -1,46 +1,15 @@
 """
 Skill Database Models - 性能优化版本
-"""
-from sqlalchemy import Column, String, Integer, Float, Text, DateTime, ForeignKey, JSON, Index, create_engine
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from typing import AsyncGenerator
 
-from wishub_skill.config import settings
-from datetime import datetime
+引擎 / 会话管理统一放在 db_session.py，这里只保留 ORM 模型。
+"""
+from sqlalchemy import Boolean, Column, String, Integer, Float, Text, DateTime, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.sql import func
 
 Base = declarative_base()
 
-# 异步引擎
-async_engine = create_async_engine(
-    settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://"),
-    echo=settings.DEBUG,
-    future=True
-)
-
-# 异步会话工厂
-AsyncSessionLocal = async_sessionmaker(
-    async_engine,
-    class_=AsyncSession,
-    expire_on_commit=False
-)
-
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """获取数据库会话（依赖注入）"""
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            try:
-                await session.commit()
-            except Exception:
-                # 如果事务已经回滚，忽略 commit 错误
-                pass
-            await session.close()
-
 
 class Skill(Base):
     """Skill 模型"""
@@ -55,14 +24,16 @@ class Skill(Base):
 
     # 代码存储
     code_url = Column(String(512), nullable=True)  # MinIO URL
-    dependencies = Column(JSON, nullable=True)
+    dependencies = Column(JSONB, nullable=True)
 
     # Schema
-    input_schema = Column(JSON, nullable=True)
-    output_schema = Column(JSON, nullable=True)
+    input_schema = Column(JSONB, nullable=True)
+    output_schema = Column(JSONB, nullable=True)
 
     # 配置
     timeout = Column(Integer, default=30)
+    # 幂等 Skill：相同输入的执行结果可缓存复用
+    memoizable = Column(Boolean, default=False)
 
     # 元数据
     author = Column(String(255), nullable=True, index=True)
@@ -74,8 +45,8 @@ class Skill(Base):
     rating = Column(Float, default=0.0)
 
     # 时间戳
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # 关系
     versions = relationship("SkillVersion", back_populates="skill", cascade="all, delete-orphan")
@@ -84,6 +55,15 @@ class Skill(Base):
     # 性能优化：复合索引
     __table_args__ = (
         Index('idx_skill_language_category', 'language', 'category'),
+        # GIN 索引支持 JSONB 包含查询（@>、?），普通 B-tree 无法覆盖
+        Index('idx_skill_deps_gin', 'dependencies', postgresql_using='gin'),
+        # pg_trgm 三元组索引：让发现接口的 ILIKE '%...%' 搜索走索引而非全表扫描
+        Index('idx_skill_name_trgm', 'skill_name',
+              postgresql_using='gin', postgresql_ops={'skill_name': 'gin_trgm_ops'}),
+        Index('idx_skill_desc_trgm', 'description',
+              postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}),
+        Index('idx_skill_id_trgm', 'skill_id',
+              postgresql_using='gin', postgresql_ops={'skill_id': 'gin_trgm_ops'}),
         Index('idx_skill_author_created', 'author', 'created_at'),
         Index('idx_skill_downloads_rating', 'downloads', 'rating'),
     )
@@ -94,15 +74,17 @@ class SkillVersion(Base):
     __tablename__ = "skill_versions"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    skill_id = Column(String(255), ForeignKey("skills.skill_id"), nullable=False, index=True)
+    # 整数代理键外键：比 String(255) 外键更小、比较更快
+    skill_pk = Column(Integer, ForeignKey("skills.id"), nullable=True, index=True)
+    skill_id = Column(String(255), nullable=False, index=True)
     version = Column(String(50), nullable=False)
 
     code_url = Column(String(512), nullable=False)
-    dependencies = Column(JSON, nullable=True)
-    input_schema = Column(JSON, nullable=True)
-    output_schema = Column(JSON, nullable=True)
+    dependencies = Column(JSONB, nullable=True)
+    input_schema = Column(JSONB, nullable=True)
+    output_schema = Column(JSONB, nullable=True)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # 关系
     skill = relationship("Skill", back_populates="versions")
@@ -110,6 +92,8 @@ class SkillVersion(Base):
     # 性能优化：复合索引
     __table_args__ = (
         Index('idx_version_skill_created', 'skill_id', 'created_at'),
+        # 唯一索引：同一 Skill 的版本号不可重复，等值查找也走此索引
+        Index('idx_version_skill_version', 'skill_id', 'version', unique=True),
     )
 
 
@@ -119,12 +103,14 @@ class SkillExecution(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     task_id = Column(String(255), unique=True, nullable=False, index=True)
-    skill_id = Column(String(255), ForeignKey("skills.skill_id"), nullable=False, index=True)
+    # 整数代理键外键：比 String(255) 外键更小、比较更快
+    skill_pk = Column(Integer, ForeignKey("skills.id"), nullable=True, index=True)
+    skill_id = Column(String(255), nullable=False, index=True)
 
     # 执行状态
     status = Column(String(50), default="pending", index=True)  # pending, running, success, error, timeout
-    inputs = Column(JSON, nullable=True)
-    outputs = Column(JSON, nullable=True)
+    inputs = Column(JSONB, nullable=True)
+    outputs = Column(JSONB, nullable=True)
     error_message = Column(Text, nullable=True)
 
     # 执行信息
@@ -132,9 +118,9 @@ class SkillExecution(Base):
     container_id = Column(String(255), nullable=True)
 
     # 时间戳
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
-    started_at = Column(DateTime, nullable=True)
-    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
 
     # 关系
     skill = relationship("Skill", back_populates="executions")
@@ -155,12 +141,12 @@ class Workflow(Base):
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
 
-    workflow_definition = Column(JSON, nullable=False)
+    workflow_definition = Column(JSONB, nullable=False)
     execution_mode = Column(String(50), default="sequential")
     timeout = Column(Integer, default=300)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
 class WorkflowExecution(Base):
@@ -172,12 +158,12 @@ class WorkflowExecution(Base):
     workflow_id = Column(String(255), nullable=False, index=True)
 
     status = Column(String(50), default="running", index=True)  # running, success, error, timeout
-    results = Column(JSON, nullable=True)
+    results = Column(JSONB, nullable=True)
     error_message = Column(Text, nullable=True)
 
     execution_time = Column(Float, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    completed_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
 
     # 性能优化：复合索引
     __table_args__ = (
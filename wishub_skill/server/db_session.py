@@ -2,6 +2,9 @@
 Database Session Management
 """
 import logging
+
+import orjson
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from contextlib import asynccontextmanager
@@ -11,13 +14,32 @@ from wishub_skill.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+def _json_serializer(obj) -> str:
+    """JSONB 列的序列化器（orjson 比标准库 json 快数倍）"""
+    return orjson.dumps(obj).decode()
+
+
 # 创建异步引擎
 engine = create_async_engine(
     f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
     f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}",
     echo=settings.DEBUG,
     pool_size=settings.POSTGRES_POOL_SIZE,
-    max_overflow=10
+    max_overflow=settings.POSTGRES_POOL_SIZE * 2,
+    # 回收空闲连接并在借出前探活，避免拿到断开的连接
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    # 注册/删除不需要可串行化，READ COMMITTED 减少锁等待
+    isolation_level="READ COMMITTED",
+    # JSONB 列读写走 orjson
+    json_serializer=_json_serializer,
+    json_deserializer=orjson.loads,
+    connect_args={
+        # asyncpg 预编译语句缓存：热查询免去每次 parse/plan
+        "prepared_statement_cache_size": 512,
+        "server_settings": {"jit": "off"},
+    }
 )
 
 # 创建会话工厂
@@ -30,7 +52,11 @@ AsyncSessionLocal = async_sessionmaker(
 
 async def get_db() -> AsyncSession:
     """
-    获取数据库会话
+    获取数据库会话（依赖注入）
+
+    事务由依赖统一管理：请求正常结束时提交一次，异常时回滚。
+    处理器内部只 flush，不自行 commit（需要让其他会话立即可见的
+    中途提交除外，如异步任务入队前）。
 
     Yields:
         数据库会话
@@ -38,9 +64,13 @@ async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
         try:
             yield session
+            # 处理器可能已捕获 flush 失败并返回错误响应，
+            # 此时事务处于待回滚状态，跳过提交交由 close 回滚
+            if session.is_active:
+                await session.commit()
         except Exception as e:
             await session.rollback()
-            logger.error(f"数据库会话错误: {e}")
+            logger.error("数据库会话错误: %s", e)
             raise
 
 
@@ -48,10 +78,12 @@ async def init_db():
     """初始化数据库"""
     try:
         async with engine.begin() as conn:
+            # 三元组索引依赖 pg_trgm 扩展，必须在建表/建索引之前就绪
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
             await conn.run_sync(Base.metadata.create_all)
         logger.info("数据库初始化完成")
     except Exception as e:
-        logger.error(f"数据库初始化失败: {e}")
+        logger.error("数据库初始化失败: %s", e)
         raise
 
 
@@ -69,5 +101,5 @@ async def get_db_context():
             await session.commit()
         except Exception as e:
             await session.rollback()
-            logger.error(f"数据库会话错误: {e}")
+            logger.error("数据库会话错误: %s", e)
             raise
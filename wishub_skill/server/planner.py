@@ -0,0 +1,83 @@
+"""
+Workflow Execution Planner (Kahn 拓扑分层)
+"""
+import logging
+from collections import defaultdict
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from wishub_skill.protocol.models import WorkflowStep
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowPlanError(ValueError):
+    """工作流无法规划（循环依赖或引用了不存在的步骤）"""
+
+
+@lru_cache(maxsize=256)
+def _levels_cached(
+    graph_key: Tuple[Tuple[str, Tuple[str, ...]], ...]
+) -> Tuple[Tuple[str, ...], ...]:
+    """
+    按 Kahn 算法把依赖图切成可并行执行的层级
+
+    同一层内的步骤互不依赖，可以并发执行；层与层之间按顺序推进。
+    相同结构的工作流命中缓存，重复提交不再重新规划。
+
+    Args:
+        graph_key: ((step_id, (依赖...)), ...) 形式的可哈希依赖图
+
+    Returns:
+        层级元组，每层是一组 step_id
+
+    Raises:
+        WorkflowPlanError: 存在循环依赖或未知依赖
+    """
+    indegree = {step_id: len(deps) for step_id, deps in graph_key}
+    dependents = defaultdict(list)
+    for step_id, deps in graph_key:
+        for dep in deps:
+            if dep not in indegree:
+                raise WorkflowPlanError(f"步骤 {step_id} 依赖了不存在的步骤: {dep}")
+            dependents[dep].append(step_id)
+
+    current = [step_id for step_id, degree in indegree.items() if degree == 0]
+    levels = []
+    planned = 0
+
+    while current:
+        levels.append(tuple(current))
+        planned += len(current)
+        next_level = []
+        for step_id in current:
+            for dependent in dependents[step_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    next_level.append(dependent)
+        current = next_level
+
+    if planned != len(indegree):
+        raise WorkflowPlanError("工作流存在循环依赖")
+
+    return tuple(levels)
+
+
+def plan_levels(steps: Sequence[WorkflowStep]) -> List[List[str]]:
+    """
+    为工作流步骤生成分层执行计划
+
+    Args:
+        steps: 工作流步骤列表
+
+    Returns:
+        层级列表，每层为可并行执行的 step_id 列表
+
+    Raises:
+        WorkflowPlanError: 存在循环依赖或未知依赖
+    """
+    graph_key = tuple(
+        (step.step_id, tuple(step.depends_on or ()))
+        for step in steps
+    )
+    return [list(level) for level in _levels_cached(graph_key)]
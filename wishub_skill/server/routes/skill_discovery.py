@@ -2,10 +2,13 @@
 Skill Discovery Routes
 """
 import logging
-from typing import Dict, Any, List
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import APIRouter, HTTPException, status, Depends, Header
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, and_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.sql import func
 
 from wishub_skill.protocol.models import (
@@ -13,13 +16,19 @@ from wishub_skill.protocol.models import (
     SkillDiscoveryResponse,
     SkillInfo
 )
-from wishub_skill.server.database import Skill, get_db
+from wishub_skill.server.database import Skill
+from wishub_skill.server.db_session import get_db
+from wishub_skill.server.responses import ORJSONResponse
 from wishub_skill.config import settings
 
 logger = logging.getLogger(__name__)
 
-# 创建路由
-router = APIRouter(prefix="/skill", tags=["Skill"])
+# 创建路由（默认用 orjson 序列化响应体）
+router = APIRouter(
+    prefix="/skill",
+    tags=["Skill"],
+    default_response_class=ORJSONResponse
+)
 
 
 async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
@@ -33,6 +42,33 @@ async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
     return x_api_key
 
 
+# SkillInfo 列表的序列化适配器（模块加载时构建一次核心 schema）
+_SKILL_LIST_ADAPTER = TypeAdapter(List[SkillInfo])
+
+# 分类/语言列表变化频率低（只在注册/删除时变），进程内做短 TTL 缓存，
+# 省掉高频列表请求的 DISTINCT 全表扫描
+_LISTING_TTL_SECONDS = 30.0
+_listing_cache: Dict[str, Tuple[float, List[str]]] = {}
+
+
+def _get_cached_listing(key: str) -> Optional[List[str]]:
+    """读取未过期的列表缓存，过期或不存在返回 None"""
+    entry = _listing_cache.get(key)
+    if entry and time.monotonic() - entry[0] < _LISTING_TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+def _set_cached_listing(key: str, values: List[str]) -> None:
+    """写入列表缓存"""
+    _listing_cache[key] = (time.monotonic(), values)
+
+
+def invalidate_listing_cache() -> None:
+    """注册/删除 Skill 后使列表缓存失效"""
+    _listing_cache.clear()
+
+
 @router.post(
     "/discovery",
     response_model=SkillDiscoveryResponse,
@@ -58,8 +94,20 @@ async def discover_skills(
         Skill 发现响应
     """
     try:
-        # 构建查询
-        query = select(Skill)
+        # 构建查询：只取 SkillInfo 需要的列，避免取整行再丢弃
+        query = select(
+            Skill.skill_id,
+            Skill.skill_name,
+            Skill.description,
+            Skill.version,
+            Skill.category,
+            Skill.language,
+            Skill.author,
+            Skill.downloads,
+            Skill.rating,
+            # 窗口函数在 LIMIT 之前求值，一条查询同时拿到分页数据和总数
+            func.count().over().label("total")
+        )
 
         # 添加过滤条件
         conditions = []
@@ -87,45 +135,39 @@ async def discover_skills(
         if conditions:
             query = query.where(and_(*conditions))
 
-        # 获取总数
-        count_query = select(func.count()).select_from(
-            query.subquery()
-        )
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-
         # 分页
         query = query.offset(request.offset).limit(request.limit)
 
-        # 执行查询
-        result = await db.execute(query)
-        skills = result.scalars().all()
+        # 执行查询：服务端游标按批流式取回，行边到达边消费，
+        # 不在驱动层整页双重缓冲
+        result = await db.stream(query.execution_options(yield_per=100))
+        rows = [row async for row in result]
+        total = rows[0].total if rows else 0
 
         # 转换为 SkillInfo 列表
-        skill_infos: List[SkillInfo] = []
-        for skill in skills:
-            skill_infos.append(SkillInfo(
-                skill_id=skill.skill_id,
-                skill_name=skill.skill_name,
-                description=skill.description,
-                version=skill.version,
-                category=skill.category,
-                language=skill.language,
-                author=skill.author,
-                downloads=skill.downloads,
-                rating=skill.rating
-            ))
-
-        logger.info(f"发现 {len(skill_infos)} 个 Skills (总数: {total})")
+        # 数据来自数据库（可信），model_construct 跳过 pydantic 校验；
+        # 行是轻量元组而非 ORM 实例，没有身份映射开销
+        skill_infos: List[SkillInfo] = [
+            SkillInfo.model_construct(
+                **{key: value for key, value in row._mapping.items() if key != "total"}
+            )
+            for row in rows
+        ]
 
-        return SkillDiscoveryResponse(
-            status="success",
-            skills=skill_infos,
-            total=total
-        )
+        logger.debug("发现 %s 个 Skills (总数: %s)", len(skill_infos), total)
 
-    except Exception as e:
-        logger.error(f"Skill 发现失败: {e}")
+        # 整个列表交给模块级 TypeAdapter 一次性 dump，再由 orjson 编码，
+        # 跳过 response_model 的二次校验和 jsonable_encoder 遍历
+        return ORJSONResponse({
+            "status": "success",
+            "skills": _SKILL_LIST_ADAPTER.dump_python(skill_infos, exclude_none=True),
+            "total": total
+        })
+
+    # 只捕获可预期的异常（数据库/IO/参数/超时），
+    # 其余异常交给应用级兜底处理器，成功路径不再背负宽泛捕获
+    except (SQLAlchemyError, OSError, ValueError, TimeoutError) as e:
+        logger.error("Skill 发现失败: %s", e)
         return SkillDiscoveryResponse(
             status="error",
             message="搜索失败",
@@ -146,11 +188,14 @@ async def list_categories(
 ) -> Dict[str, Any]:
     """获取所有分类"""
     try:
-        # 查询所有不同的分类
-        result = await db.execute(
-            select(Skill.category).where(Skill.category.isnot(None)).distinct()
-        )
-        categories = [row[0] for row in result.all()]
+        categories = _get_cached_listing("categories")
+        if categories is None:
+            # 查询所有不同的分类
+            result = await db.execute(
+                select(Skill.category).where(Skill.category.isnot(None)).distinct()
+            )
+            categories = [row[0] for row in result.all()]
+            _set_cached_listing("categories", categories)
 
         return {
             "status": "success",
@@ -159,7 +204,7 @@ async def list_categories(
         }
 
     except Exception as e:
-        logger.error(f"获取分类失败: {e}")
+        logger.error("获取分类失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -176,11 +221,14 @@ async def list_languages(
 ) -> Dict[str, Any]:
     """获取所有编程语言"""
     try:
-        # 查询所有不同的编程语言
-        result = await db.execute(
-            select(Skill.language).distinct()
-        )
-        languages = [row[0] for row in result.all()]
+        languages = _get_cached_listing("languages")
+        if languages is None:
+            # 查询所有不同的编程语言
+            result = await db.execute(
+                select(Skill.language).distinct()
+            )
+            languages = [row[0] for row in result.all()]
+            _set_cached_listing("languages", languages)
 
         return {
             "status": "success",
@@ -189,7 +237,7 @@ async def list_languages(
         }
 
     except Exception as e:
-        logger.error(f"获取编程语言失败: {e}")
+        logger.error("获取编程语言失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -1,12 +1,16 @@
 """
 Skill Invocation Routes
 """
+import hashlib
 import logging
 import uuid
+
+import orjson
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, status, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, bindparam
+from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 
 from wishub_skill.protocol.models import (
@@ -14,13 +18,42 @@ from wishub_skill.protocol.models import (
     SkillInvokeResponse
 )
 from wishub_skill.server.runtime import runtime_engine
-from wishub_skill.server.database import Skill, SkillExecution, get_db
+from wishub_skill.server.database import Skill, SkillExecution
+from wishub_skill.server.db_session import get_db
+from wishub_skill.server.validation import get_validator, SchemaValidationError
+from wishub_skill.server.cache import get_redis_client
+from wishub_skill.server.task_pool import task_pool
+from wishub_skill.server.skill_cache import get_skill
+from wishub_skill.monitoring.metrics import record_cache_operation
+from wishub_skill.server.responses import ORJSONResponse
 from wishub_skill.config import settings
 
 logger = logging.getLogger(__name__)
 
-# 创建路由
-router = APIRouter(prefix="/skill", tags=["Skill"])
+# 创建路由（默认用 orjson 序列化响应体）
+router = APIRouter(
+    prefix="/skill",
+    tags=["Skill"],
+    default_response_class=ORJSONResponse
+)
+
+# 幂等 Skill 结果缓存的 TTL（秒）
+_MEMO_TTL_SECONDS = 300
+
+# 模块级预构建查询：select 只编译一次，配合 asyncpg 的
+# 预编译语句缓存复用服务端执行计划
+_EXEC_BY_TASK = select(SkillExecution).where(
+    SkillExecution.task_id == bindparam("task_id")
+)
+
+
+def _memo_key(skill: Skill, inputs: Optional[Dict[str, Any]]) -> str:
+    """计算幂等 Skill 的结果缓存键（skill_id + version + 规范化输入）"""
+    payload = orjson.dumps(
+        [skill.skill_id, skill.version, inputs],
+        option=orjson.OPT_SORT_KEYS
+    )
+    return f"skill:memo:{hashlib.sha256(payload).hexdigest()}"
 
 
 async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
@@ -60,14 +93,11 @@ async def invoke_skill(
     start_time = datetime.utcnow()
 
     try:
-        # 1. 查询 Skill
-        result = await db.execute(
-            select(Skill).where(Skill.skill_id == request.skill_id)
-        )
-        skill = result.scalar_one_or_none()
+        # 1. 查询 Skill（进程内 TTL 缓存，热门 Skill 不再每次调用都 SELECT）
+        skill = await get_skill(request.skill_id, db)
 
         if not skill:
-            logger.warning(f"Skill 不存在: {request.skill_id}")
+            logger.warning("Skill 不存在: %s", request.skill_id)
             return SkillInvokeResponse(
                 status="error",
                 message=f"Skill 不存在: {request.skill_id}",
@@ -77,26 +107,73 @@ async def invoke_skill(
                 }
             )
 
-        # 2. 验证输入参数
+        # 2. 验证输入参数（编译后的验证器有进程内缓存）
         if skill.input_schema:
-            # TODO: 实现 JSON Schema 验证
-            pass
+            try:
+                get_validator(skill.input_schema)(request.inputs)
+            except SchemaValidationError as e:
+                logger.warning("输入参数校验失败: %s - %s", request.skill_id, e.message)
+                return SkillInvokeResponse(
+                    status="error",
+                    message="输入参数校验失败",
+                    error={
+                        "code": "SKILL_002",
+                        "details": e.message
+                    }
+                )
+
+        # 2.5 幂等 Skill：相同输入直接复用缓存结果，跳过容器执行
+        cache_key = None
+        if skill.memoizable and not request.is_async:
+            cache_key = _memo_key(skill, request.inputs)
+            try:
+                cached = await get_redis_client().get(cache_key)
+            except Exception as e:
+                # 缓存不可用时退化为正常执行，绝不让缓存故障影响调用
+                logger.warning("结果缓存不可用: %s", e)
+                cached = None
+
+            if cached is not None:
+                record_cache_operation("memo_get", "hit")
+                logger.debug("命中结果缓存: %s", request.skill_id)
+                return SkillInvokeResponse(
+                    status="success",
+                    task_id=task_id,
+                    outputs=orjson.loads(cached),
+                    execution_time=0.0,
+                    message="命中结果缓存"
+                )
+            record_cache_operation("memo_get", "miss")
 
         # 3. 创建执行记录
         execution = SkillExecution(
             task_id=task_id,
+            skill_pk=skill.id,
             skill_id=request.skill_id,
             status="pending",
             inputs=request.inputs,
             created_at=start_time
         )
         db.add(execution)
-        await db.commit()
+        # 只 flush 不提交：同步路径最后一次性提交，
+        # 异步路径在任务入队前提交（worker 会话要能看到记录）
+        await db.flush()
 
         # 4. 执行 Skill
         if request.is_async:
-            # 异步执行
-            logger.info(f"异步执行 Skill: {request.skill_id}")
+            # 异步执行：交给后台任务池，worker 用独立会话更新执行记录
+            await db.commit()
+            submitted = await task_pool.submit(
+                task_id=task_id,
+                skill_id=request.skill_id,
+                inputs=request.inputs,
+                timeout=request.timeout
+            )
+            if not submitted:
+                # 任务池未启动（如测试环境），任务保持 pending 状态
+                logger.warning("任务池未启动，任务仅入库: %s", task_id)
+
+            logger.debug("异步执行 Skill: %s", request.skill_id)
             return SkillInvokeResponse(
                 status="pending",
                 task_id=task_id,
@@ -104,12 +181,11 @@ async def invoke_skill(
             )
         else:
             # 同步执行
-            logger.info(f"同步执行 Skill: {request.skill_id}")
+            logger.debug("同步执行 Skill: %s", request.skill_id)
 
-            # 更新状态为运行中
+            # 更新状态为运行中（随结果一起提交，不单独往返）
             execution.status = "running"
             execution.started_at = datetime.utcnow()
-            await db.commit()
 
             try:
                 # 调用运行时引擎
@@ -137,9 +213,21 @@ async def invoke_skill(
                 execution.completed_at = end_time
                 execution.container_id = result.get("container_id")
 
-                await db.commit()
+                await db.flush()
 
-                logger.info(f"Skill 执行完成: {request.skill_id} (状态: {result['status']})")
+                # 幂等 Skill 成功结果写入缓存
+                if cache_key and result["status"] == "success":
+                    try:
+                        await get_redis_client().setex(
+                            cache_key,
+                            _MEMO_TTL_SECONDS,
+                            orjson.dumps(result.get("outputs"))
+                        )
+                        record_cache_operation("memo_set", "success")
+                    except Exception as e:
+                        logger.warning("写入结果缓存失败: %s", e)
+
+                logger.debug("Skill 执行完成: %s (状态: %s)", request.skill_id, result['status'])
 
                 return SkillInvokeResponse(
                     status="success" if result["status"] == "success" else result["status"],
@@ -150,12 +238,12 @@ async def invoke_skill(
                 )
 
             except Exception as e:
-                logger.error(f"Skill 执行失败: {e}")
+                logger.error("Skill 执行失败: %s", e)
 
                 execution.status = "error"
                 execution.error_message = str(e)
                 execution.completed_at = datetime.utcnow()
-                await db.commit()
+                await db.flush()
 
                 return SkillInvokeResponse(
                     status="error",
@@ -166,15 +254,17 @@ async def invoke_skill(
                     }
                 )
 
-    except Exception as e:
-        logger.error(f"Skill 调用失败: {e}")
+    # 只捕获可预期的异常（数据库/IO/参数/超时），
+    # 其余异常交给应用级兜底处理器，成功路径不再背负宽泛捕获
+    except (SQLAlchemyError, OSError, ValueError, TimeoutError) as e:
+        logger.error("Skill 调用失败: %s", e)
 
         # 更新执行记录为错误状态
         try:
             execution.status = "error"
             execution.error_message = str(e)
             execution.completed_at = datetime.utcnow()
-            await db.commit()
+            await db.flush()
         except:
             pass
 
@@ -201,10 +291,8 @@ async def get_task_status(
 ) -> SkillInvokeResponse:
     """获取任务状态"""
     try:
-        # 查询执行记录
-        result = await db.execute(
-            select(SkillExecution).where(SkillExecution.task_id == task_id)
-        )
+        # 查询执行记录（预构建语句 + 绑定参数）
+        result = await db.execute(_EXEC_BY_TASK, {"task_id": task_id})
         execution = result.scalar_one_or_none()
 
         if not execution:
@@ -228,8 +316,8 @@ async def get_task_status(
 
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"获取任务状态失败: {e}")
+    except (SQLAlchemyError, OSError, ValueError, TimeoutError) as e:
+        logger.error("获取任务状态失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
@@ -1,15 +1,17 @@
 """
 Skill Orchestration Routes
 """
+import asyncio
 import logging
+import re
 import uuid
-from typing import Dict, Any, List, Set
+from typing import Dict, Any, List, Optional, Set
 from datetime import datetime
-from collections import defaultdict, deque
 
 from fastapi import APIRouter, HTTPException, status, Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, bindparam
+from sqlalchemy.exc import SQLAlchemyError
 
 from wishub_skill.protocol.models import (
     SkillOrchestrationRequest,
@@ -19,13 +21,41 @@ from wishub_skill.protocol.models import (
     ExecutionMode
 )
 from wishub_skill.server.runtime import runtime_engine
-from wishub_skill.server.database import Skill, Workflow, WorkflowExecution, get_db
+from wishub_skill.server.planner import plan_levels, WorkflowPlanError
+from wishub_skill.server.database import Skill, SkillExecution, Workflow, WorkflowExecution
+from wishub_skill.server.db_session import get_db
+from wishub_skill.server.skill_cache import get_skills
+from wishub_skill.server.responses import ORJSONResponse
 from wishub_skill.config import settings
 
 logger = logging.getLogger(__name__)
 
-# 创建路由
-router = APIRouter(prefix="/skill", tags=["Skill"])
+# 创建路由（默认用 orjson 序列化响应体）
+router = APIRouter(
+    prefix="/skill",
+    tags=["Skill"],
+    default_response_class=ORJSONResponse
+)
+
+# 步骤间结果引用的 {{step_id.field}} 占位符（模块加载时编译一次）
+_REF_PATTERN = re.compile(r'\{\{(\w+)\.(\w+)\}\}')
+
+# 模块级预构建查询：select 只编译一次，配合 asyncpg 的
+# 预编译语句缓存复用服务端执行计划
+_WF_EXEC_BY_ID = select(WorkflowExecution).where(
+    WorkflowExecution.execution_id == bindparam("execution_id")
+)
+
+# 限制单进程内同时运行的步骤容器数，防止大工作流把 Docker 压垮
+_step_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _get_step_semaphore() -> asyncio.Semaphore:
+    """获取步骤并发信号量（在事件循环内惰性创建）"""
+    global _step_semaphore
+    if _step_semaphore is None:
+        _step_semaphore = asyncio.Semaphore(settings.MAX_PARALLEL_STEPS)
+    return _step_semaphore
 
 
 async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
@@ -71,15 +101,17 @@ async def orchestrate_skills(
         if not request.workflow.steps:
             raise ValueError("工作流必须包含至少一个步骤")
 
-        # 2. 检查依赖循环
-        has_cycle = _check_cyclic_dependencies(request.workflow.steps)
-        if has_cycle:
+        # 2. 检查依赖合法性：直接做 Kahn 分层规划，循环依赖/未知依赖
+        # 在这里就拒绝，规划结果进缓存供执行阶段复用
+        try:
+            plan_levels(request.workflow.steps)
+        except WorkflowPlanError as e:
             return SkillOrchestrationResponse(
                 status="error",
                 message="工作流存在循环依赖",
                 error={
                     "code": "WORKFLOW_002",
-                    "details": "检测到循环依赖"
+                    "details": str(e)
                 }
             )
 
@@ -92,9 +124,6 @@ async def orchestrate_skills(
             execution_mode=request.execution_mode.value,
             timeout=request.timeout
         )
-        db.add(workflow)
-        await db.commit()
-
         # 4. 创建执行记录
         execution = WorkflowExecution(
             execution_id=execution_id,
@@ -102,13 +131,16 @@ async def orchestrate_skills(
             status="running",
             created_at=start_time
         )
+
+        # 两条插入同批 flush，整个请求只在会话依赖里提交一次
+        db.add(workflow)
         db.add(execution)
-        await db.commit()
+        await db.flush()
 
         # 5. 执行工作流
         logger.info(
-            f"执行工作流: {request.workflow_id} "
-            f"(模式: {request.execution_mode}, 步骤数: {len(request.workflow.steps)})"
+            "执行工作流: %s (模式: %s, 步骤数: %s)",
+            request.workflow_id, request.execution_mode, len(request.workflow.steps)
         )
 
         try:
@@ -126,9 +158,26 @@ async def orchestrate_skills(
             execution.results = results
             execution.execution_time = execution_time
             execution.completed_at = end_time
-            await db.commit()
 
-            logger.info(f"工作流执行成功: {request.workflow_id}")
+            # 批量写入各步骤的执行记录：单条 executemany INSERT，
+            # 避免每步骤一次往返
+            step_rows = []
+            for step in request.workflow.steps:
+                step_result = results.get(step.step_id)
+                step_rows.append({
+                    "task_id": str(uuid.uuid4()),
+                    "skill_id": step.skill_id,
+                    "status": (
+                        step_result.get("status", "error")
+                        if isinstance(step_result, dict) else "error"
+                    ),
+                    "outputs": step_result if isinstance(step_result, dict) else None,
+                })
+            if step_rows:
+                await db.execute(insert(SkillExecution), step_rows)
+            await db.flush()
+
+            logger.info("工作流执行成功: %s", request.workflow_id)
 
             return SkillOrchestrationResponse(
                 status="success",
@@ -139,12 +188,12 @@ async def orchestrate_skills(
             )
 
         except Exception as e:
-            logger.error(f"工作流执行失败: {e}")
+            logger.error("工作流执行失败: %s", e)
 
             execution.status = "error"
             execution.error_message = str(e)
             execution.completed_at = datetime.utcnow()
-            await db.commit()
+            await db.flush()
 
             return SkillOrchestrationResponse(
                 status="error",
@@ -156,8 +205,10 @@ async def orchestrate_skills(
                 }
             )
 
-    except Exception as e:
-        logger.error(f"工作流编排失败: {e}")
+    # 只捕获可预期的异常（数据库/IO/参数/超时），
+    # 其余异常交给应用级兜底处理器，成功路径不再背负宽泛捕获
+    except (SQLAlchemyError, OSError, ValueError, TimeoutError) as e:
+        logger.error("工作流编排失败: %s", e)
         return SkillOrchestrationResponse(
             status="error",
             message="编排失败",
@@ -187,110 +238,80 @@ async def _execute_workflow(
     results = {}
     completed_steps: Set[str] = set()
 
+    # 一次查询预加载所有步骤引用的 Skill，消除每步骤一次 SELECT 的 N+1
+    skill_map = await _preload_skills(steps, db)
+
     if mode == ExecutionMode.SEQUENTIAL:
         # 顺序执行
         for step in steps:
-            logger.info(f"执行步骤: {step.step_id}")
-            result = await _execute_step(step, db, results)
+            logger.debug("执行步骤: %s", step.step_id)
+            result = await _execute_step(step, skill_map, results)
             results[step.step_id] = result
             completed_steps.add(step.step_id)
 
     elif mode == ExecutionMode.PARALLEL:
-        # 并行执行（假设所有步骤无依赖）
-        import asyncio
-
-        tasks = []
-        for step in steps:
-            if not step.depends_on:
-                task = _execute_step(step, db, results)
-                tasks.append((step.step_id, task))
-            else:
-                # 有依赖的步骤需要特殊处理
-                results[step.step_id] = await _execute_step(step, db, results)
-
-        # 并行执行无依赖的步骤
-        executed_results = await asyncio.gather(
-            *[task for _, task in tasks],
-            return_exceptions=True
-        )
-
-        for (step_id, _), result in zip(tasks, executed_results):
-            results[step_id] = result
+        # 并行执行：复用 DAG 调度器。无依赖时退化为单层全并发；
+        # 带依赖的步骤按层并发推进，而不是退回串行 await
+        results = await _execute_dag(steps, skill_map)
 
     elif mode == ExecutionMode.HYBRID:
         # 混合执行（DAG 调度）
-        results = await _execute_dag(steps, db)
+        results = await _execute_dag(steps, skill_map)
 
     return results
 
 
-async def _execute_dag(
+async def _preload_skills(
     steps: List[WorkflowStep],
     db: AsyncSession
-) -> Dict[str, Any]:
+) -> Dict[str, Skill]:
     """
-    按 DAG 顺序执行工作流
+    批量预加载工作流引用的所有 Skill
 
     Args:
         steps: 工作流步骤列表
         db: 数据库会话
 
     Returns:
-        各步骤的执行结果
+        skill_id 到 Skill 的映射
     """
-    results = {}
-    completed: Set[str] = set()
-
-    # 构建依赖图
-    dependency_map = defaultdict(list)
-    reverse_map = defaultdict(list)
+    # 命中进程内缓存的 Skill 不再查库，只为未命中的发一次 IN 查询
+    return await get_skills({step.skill_id for step in steps}, db)
 
-    for step in steps:
-        for dep in step.depends_on or []:
-            dependency_map[dep].append(step)
-            reverse_map[step.step_id].append(dep)
 
-    # 初始化待执行队列（无依赖的步骤）
-    queue = deque([
-        step for step in steps
-        if not step.depends_on
-    ])
-
-    import asyncio
+async def _execute_dag(
+    steps: List[WorkflowStep],
+    skill_map: Dict[str, Skill]
+) -> Dict[str, Any]:
+    """
+    按 DAG 顺序执行工作流
 
-    while queue:
-        # 获取当前可执行的步骤
-        current_steps = []
-        while queue:
-            current_steps.append(queue.popleft())
+    Args:
+        steps: 工作流步骤列表
+        skill_map: 预加载的 skill_id 到 Skill 的映射
 
-        # 并行执行当前步骤
-        tasks = []
-        for step in current_steps:
-            task = _execute_step(step, db, results)
-            tasks.append((step.step_id, task))
+    Returns:
+        各步骤的执行结果
+    """
+    results = {}
+    step_map = {step.step_id: step for step in steps}
 
+    # 分层执行计划由 planner 预先算好（相同结构的工作流命中缓存），
+    # 执行阶段只需逐层 gather
+    for level in plan_levels(steps):
         executed_results = await asyncio.gather(
-            *[task for _, task in tasks],
+            *[_execute_step(step_map[step_id], skill_map, results) for step_id in level],
             return_exceptions=True
         )
-
-        for (step_id, _), result in zip(tasks, executed_results):
+        for step_id, result in zip(level, executed_results):
             results[step_id] = result
-            completed.add(step_id)
-
-            # 检查依赖此步骤的步骤是否可以执行
-            for dependent_step in dependency_map[step_id]:
-                deps = reverse_map[dependent_step.step_id]
-                if all(dep in completed for dep in deps):
-                    queue.append(dependent_step)
 
     return results
 
 
 async def _execute_step(
     step: WorkflowStep,
-    db: AsyncSession,
+    skill_map: Dict[str, Skill],
     context: Dict[str, Any]
 ) -> Dict[str, Any]:
     """
@@ -298,36 +319,32 @@ async def _execute_step(
 
     Args:
         step: 工作流步骤
-        db: 数据库会话
+        skill_map: 预加载的 skill_id 到 Skill 的映射
         context: 上下文（包含前置步骤的结果）
 
     Returns:
         执行结果
     """
     try:
-        # 查询 Skill
-        result = await db.execute(
-            select(Skill).where(Skill.skill_id == step.skill_id)
-        )
-        skill = result.scalar_one_or_none()
-
+        skill = skill_map.get(step.skill_id)
         if not skill:
             raise ValueError(f"Skill 不存在: {step.skill_id}")
 
         # 解析输入（支持引用前置步骤的结果）
         resolved_inputs = _resolve_inputs(step.inputs, context)
 
-        # 执行 Skill
-        execution_result = await runtime_engine.execute_skill(
-            skill=skill,
-            inputs=resolved_inputs,
-            timeout=skill.timeout
-        )
+        # 执行 Skill（信号量限制同时在跑的容器数）
+        async with _get_step_semaphore():
+            execution_result = await runtime_engine.execute_skill(
+                skill=skill,
+                inputs=resolved_inputs,
+                timeout=skill.timeout
+            )
 
         return execution_result
 
     except Exception as e:
-        logger.error(f"步骤执行失败: {step.step_id} - {e}")
+        logger.error("步骤执行失败: %s - %s", step.step_id, e)
         return {
             "status": "error",
             "error": str(e)
@@ -345,20 +362,23 @@ def _resolve_inputs(inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str
     Returns:
         解析后的输入
     """
-    import re
+    def replace_ref(match: "re.Match[str]") -> str:
+        step_id, field = match.group(1), match.group(2)
+        step_result = context.get(step_id)
+        if isinstance(step_result, dict) and step_result.get("status") == "success":
+            outputs = step_result.get("outputs") or {}
+            if field in outputs:
+                return str(outputs[field])
+        # 无法解析的引用原样保留
+        return match.group(0)
 
     def resolve_value(value):
         if isinstance(value, str):
-            # 匹配 {{step_id.field}} 格式
-            pattern = r'\{\{(\w+)\.(\w+)\}\}'
-            matches = re.findall(pattern, value)
-
-            for step_id, field in matches:
-                if step_id in context and context[step_id].get("status") == "success":
-                    outputs = context[step_id].get("outputs", {})
-                    if field in outputs:
-                        value = value.replace(f"{{{{{step_id}.{field}}}}}", str(outputs[field]))
-
+            # 绝大多数输入不含引用，廉价的子串判断先于正则扫描
+            if '{{' not in value:
+                return value
+            # 单次 sub 扫描替换所有 {{step_id.field}} 引用
+            return _REF_PATTERN.sub(replace_ref, value)
         return value
 
     if isinstance(inputs, dict):
@@ -369,45 +389,6 @@ def _resolve_inputs(inputs: Dict[str, Any], context: Dict[str, Any]) -> Dict[str
         return resolve_value(inputs)
 
 
-def _check_cyclic_dependencies(steps: List[WorkflowStep]) -> bool:
-    """
-    检查工作流是否存在循环依赖
-
-    Args:
-        steps: 工作流步骤列表
-
-    Returns:
-        是否存在循环依赖
-    """
-    # 构建依赖图
-    graph = {step.step_id: step.depends_on or [] for step in steps}
-
-    # 检测循环（使用 DFS）
-    def visit(node, visited, rec_stack):
-        visited.add(node)
-        rec_stack.add(node)
-
-        for neighbor in graph.get(node, []):
-            if neighbor not in visited:
-                if visit(neighbor, visited, rec_stack):
-                    return True
-            elif neighbor in rec_stack:
-                return True
-
-        rec_stack.remove(node)
-        return False
-
-    visited: Set[str] = set()
-    rec_stack: Set[str] = set()
-
-    for node in graph:
-        if node not in visited:
-            if visit(node, visited, rec_stack):
-                return True
-
-    return False
-
-
 @router.get(
     "/workflow/{execution_id}",
     summary="获取工作流执行状态",
@@ -420,12 +401,8 @@ async def get_workflow_status(
 ) -> SkillOrchestrationResponse:
     """获取工作流执行状态"""
     try:
-        # 查询执行记录
-        result = await db.execute(
-            select(WorkflowExecution).where(
-                WorkflowExecution.execution_id == execution_id
-            )
-        )
+        # 查询执行记录（预构建语句 + 绑定参数）
+        result = await db.execute(_WF_EXEC_BY_ID, {"execution_id": execution_id})
         execution = result.scalar_one_or_none()
 
         if not execution:
@@ -444,8 +421,8 @@ async def get_workflow_status(
 
     except HTTPException:
         raise
-    except Exception as e:
-        logger.error(f"获取工作流状态失败: {e}")
+    except (SQLAlchemyError, OSError, ValueError, TimeoutError) as e:
+        logger.error("获取工作流状态失败: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
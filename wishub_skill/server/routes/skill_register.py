@@ -1,25 +1,56 @@
 """
 Skill Registration Routes
 """
+import asyncio
+import hashlib
 import logging
 import base64
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, status, Depends, Header
+import binascii
+from typing import Dict, Any, List, Optional
+
+import orjson
+import pybase64
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    status,
+    Depends,
+    Header,
+    Form,
+    File,
+    UploadFile
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from wishub_skill.protocol.models import (
     SkillRegistrationRequest,
-    SkillRegistrationResponse
+    SkillRegistrationConfirmRequest,
+    SkillRegistrationResponse,
+    SkillLanguage
 )
 from wishub_skill.server.storage import storage_client
-from wishub_skill.server.database import Skill, get_db, SkillVersion
+from wishub_skill.server.database import Skill, SkillVersion
+from wishub_skill.server.db_session import get_db
+from wishub_skill.server.validation import get_validator, SchemaDefinitionError
+from wishub_skill.server.routes.skill_discovery import invalidate_listing_cache
+from wishub_skill.server.skill_cache import get_skill, invalidate_skill
+from wishub_skill.server.responses import ORJSONResponse
 from wishub_skill.config import settings
 
 logger = logging.getLogger(__name__)
 
-# 创建路由
-router = APIRouter(prefix="/skill", tags=["Skill"])
+# 创建路由（默认用 orjson 序列化响应体）
+router = APIRouter(
+    prefix="/skill",
+    tags=["Skill"],
+    default_response_class=ORJSONResponse
+)
+
+
+# 源码必须是 UTF-8 文本的语言（编译型语言的字节不做文本校验）
+_UTF8_SOURCE_LANGUAGES = (SkillLanguage.PYTHON, SkillLanguage.TYPESCRIPT)
 
 
 async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
@@ -33,6 +64,201 @@ async def verify_api_key(x_api_key: str = Header(..., alias="X-API-Key")):
     return x_api_key
 
 
+async def _register_skill(
+    db: AsyncSession,
+    *,
+    skill_id: str,
+    skill_name: str,
+    version: str,
+    language: SkillLanguage,
+    code_bytes: bytes,
+    description: Optional[str] = None,
+    dependencies: Optional[List[str]] = None,
+    input_schema: Optional[Dict[str, Any]] = None,
+    output_schema: Optional[Dict[str, Any]] = None,
+    timeout: int = 30,
+    memoizable: bool = False,
+    author: Optional[str] = None,
+    license: Optional[str] = None,
+    category: Optional[str] = None
+) -> SkillRegistrationResponse:
+    """
+    注册逻辑核心（JSON 端点与 multipart 端点共用）
+
+    Args:
+        db: 数据库会话
+        skill_id: Skill ID
+        skill_name: Skill 名称
+        version: 版本号
+        language: 编程语言
+        code_bytes: 已解码的代码字节
+        其余参数与 SkillRegistrationRequest 字段一致
+
+    Returns:
+        Skill 注册响应
+    """
+    try:
+        # 1. 校验代码为合法 UTF-8 文本（仅源码为文本的语言需要）
+        if language in _UTF8_SOURCE_LANGUAGES:
+            try:
+                code_bytes.decode('utf-8')
+            except UnicodeDecodeError:
+                logger.error("代码不是合法的 UTF-8 文本: %s", skill_id)
+                return SkillRegistrationResponse(
+                    status="error",
+                    message="代码格式无效",
+                    error={
+                        "code": "SKILL_REG_003",
+                        "details": "代码不是合法的 UTF-8 文本"
+                    }
+                )
+
+        # 2. 预编译输入/输出 Schema：无效的 schema 在注册时就拒绝，
+        # 而不是等到首次调用才失败；编译结果同时预热了调用路径的缓存
+        try:
+            if input_schema:
+                get_validator(input_schema)
+            if output_schema:
+                get_validator(output_schema)
+        except SchemaDefinitionError as e:
+            logger.error("Schema 定义无效: %s", e)
+            return SkillRegistrationResponse(
+                status="error",
+                message="Schema 定义无效",
+                error={
+                    "code": "SKILL_REG_004",
+                    "details": str(e)
+                }
+            )
+
+        # 3. 内容哈希只算一次（hashlib.sha256 走 CPU SHA 扩展）：
+        # 对象按内容寻址，URL 在上传前即可确定性构建
+        code_hash = hashlib.sha256(code_bytes).hexdigest()
+        code_url = storage_client.object_url(skill_id, version, code_hash)
+
+        # 4. 单语句落库：INSERT ... ON CONFLICT DO NOTHING RETURNING
+        # 把存在性检查与插入合并为一次往返，同时消除 SELECT 与
+        # INSERT 之间的并发注册竞态；RETURNING 直接取回 created_at，
+        # 不再 refresh。整个注册在会话的单一事务内执行，
+        # 由 get_db 统一提交/回滚
+        insert_result = await db.execute(
+            pg_insert(Skill)
+            .values(
+                skill_id=skill_id,
+                skill_name=skill_name,
+                description=description,
+                version=version,
+                language=language.value,
+                code_url=code_url,
+                dependencies=dependencies,
+                input_schema=input_schema,
+                output_schema=output_schema,
+                timeout=timeout,
+                memoizable=memoizable,
+                author=author,
+                license=license,
+                category=category
+            )
+            .on_conflict_do_nothing(index_elements=["skill_id"])
+            .returning(Skill.id, Skill.created_at)
+        )
+        inserted = insert_result.one_or_none()
+
+        if inserted is None:
+            # 冲突即已存在，此时尚未做任何存储 IO
+            logger.warning("Skill 已存在: %s", skill_id)
+            return SkillRegistrationResponse(
+                status="error",
+                message=f"Skill 已存在: {skill_id}",
+                error={
+                    "code": "SKILL_REG_001",
+                    "details": "Skill ID 已被使用"
+                }
+            )
+
+        skill_pk, created_at = inserted
+
+        # 5. MinIO 上传与版本记录插入并发：PUT 在线程池里跑，
+        # 网络延迟与 DB 往返重叠。去重已由上面的插入完成，
+        # 此时上传不会覆盖既有 Skill 的代码
+        upload_task = asyncio.create_task(
+            asyncio.to_thread(
+                storage_client.upload_code,
+                skill_id=skill_id,
+                version=version,
+                code_bytes=code_bytes,
+                content_hash=code_hash
+            )
+        )
+
+        try:
+            await db.execute(
+                insert(SkillVersion).values(
+                    skill_pk=skill_pk,
+                    skill_id=skill_id,
+                    version=version,
+                    code_url=code_url,
+                    dependencies=dependencies,
+                    input_schema=input_schema,
+                    output_schema=output_schema
+                )
+            )
+        except Exception:
+            upload_task.cancel()
+            raise
+
+        # 6. 等待上传完成；失败则回滚本次插入
+        try:
+            await upload_task
+            logger.debug("代码上传成功: %s", code_url)
+        except Exception as e:
+            logger.error("代码上传失败: %s", e)
+            await db.rollback()
+            return SkillRegistrationResponse(
+                status="error",
+                message="代码上传失败",
+                error={
+                    "code": "SKILL_REG_999",
+                    "details": str(e)
+                }
+            )
+
+        # 新分类/语言可能出现，使列表缓存失效；Skill 缓存同步失效
+        invalidate_listing_cache()
+        invalidate_skill(skill_id)
+
+        logger.info("Skill 注册成功: %s v%s", skill_id, version)
+
+        return SkillRegistrationResponse(
+            status="success",
+            skill_id=skill_id,
+            version=version,
+            registration_time=created_at.isoformat(),
+            message="Skill 注册成功"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Skill 注册失败: %s", e)
+        await db.rollback()
+
+        # 清理已上传的代码（阻塞的存储调用进线程池，不卡事件循环）
+        try:
+            await asyncio.to_thread(storage_client.delete_code, skill_id, version)
+        except:
+            pass
+
+        return SkillRegistrationResponse(
+            status="error",
+            message="注册失败",
+            error={
+                "code": "SKILL_REG_999",
+                "details": str(e)
+            }
+        )
+
+
 @router.post(
     "/register",
     response_model=SkillRegistrationResponse,
@@ -60,116 +286,288 @@ async def register_skill(
     Raises:
         HTTPException: 如果发生错误
     """
+    # 解码 Base64 代码（pybase64 走 SIMD 内核，大负载快数倍；
+    # 直接解码进 bytearray，省掉一次不可变 bytes 的整块拷贝）
+    try:
+        # O(1) 预检：长度不是 4 的倍数时严格解码必然失败，
+        # 直接走宽松路径，省掉一次注定失败的全量扫描
+        if len(request.code) % 4 == 0:
+            try:
+                code_bytes = pybase64.b64decode_as_bytearray(
+                    request.code, validate=True
+                )
+            except binascii.Error:
+                # 含空白等非严格编码时退回标准库的宽松解码
+                code_bytes = base64.b64decode(request.code)
+        else:
+            code_bytes = base64.b64decode(request.code)
+    except (binascii.Error, ValueError) as e:
+        logger.error("代码解码失败: %s", e)
+        return SkillRegistrationResponse(
+            status="error",
+            message="代码格式无效",
+            error={
+                "code": "SKILL_REG_003",
+                "details": "Base64 解码失败"
+            }
+        )
+
+    return await _register_skill(
+        db,
+        skill_id=request.skill_id,
+        skill_name=request.skill_name,
+        version=request.version,
+        language=request.language,
+        code_bytes=code_bytes,
+        description=request.description,
+        dependencies=request.dependencies,
+        input_schema=request.input_schema,
+        output_schema=request.output_schema,
+        timeout=request.timeout,
+        memoizable=request.memoizable,
+        author=request.author,
+        license=request.license,
+        category=request.category
+    )
+
+
+@router.post(
+    "/register/binary",
+    response_model=SkillRegistrationResponse,
+    summary="注册 Skill（二进制上传）",
+    description="以 multipart/form-data 上传原始代码字节注册 Skill，免去 Base64 编解码"
+)
+async def register_skill_binary(
+    skill_id: str = Form(...),
+    skill_name: str = Form(...),
+    version: str = Form(...),
+    language: SkillLanguage = Form(...),
+    code: UploadFile = File(...),
+    description: Optional[str] = Form(default=None),
+    dependencies: Optional[str] = Form(
+        default=None, description="依赖列表（JSON 数组字符串）"
+    ),
+    input_schema: Optional[str] = Form(
+        default=None, description="输入 Schema（JSON 对象字符串）"
+    ),
+    output_schema: Optional[str] = Form(
+        default=None, description="输出 Schema（JSON 对象字符串）"
+    ),
+    timeout: int = Form(default=30, ge=1, le=300),
+    memoizable: bool = Form(default=False),
+    author: Optional[str] = Form(default=None),
+    license: Optional[str] = Form(default=None),
+    category: Optional[str] = Form(default=None),
+    db: AsyncSession = Depends(get_db),
+    api_key: str = Depends(verify_api_key)
+) -> SkillRegistrationResponse:
+    """
+    Skill 二进制注册端点
+
+    代码以原始字节上传，跳过 Base64 的 33% 体积膨胀和两端的编解码；
+    结构化字段（dependencies/schema）以 JSON 字符串表单字段传递。
+    """
+    # 解析 JSON 表单字段
     try:
-        # 1. 检查 Skill 是否已存在
-        result = await db.execute(
-            select(Skill).where(Skill.skill_id == request.skill_id)
+        dependencies_parsed = orjson.loads(dependencies) if dependencies else None
+        input_schema_parsed = orjson.loads(input_schema) if input_schema else None
+        output_schema_parsed = orjson.loads(output_schema) if output_schema else None
+    except orjson.JSONDecodeError as e:
+        logger.error("表单字段 JSON 解析失败: %s", e)
+        return SkillRegistrationResponse(
+            status="error",
+            message="表单字段格式无效",
+            error={
+                "code": "SKILL_REG_003",
+                "details": "dependencies/input_schema/output_schema 必须是合法 JSON"
+            }
         )
-        existing_skill = result.scalar_one_or_none()
 
-        if existing_skill:
-            logger.warning(f"Skill 已存在: {request.skill_id}")
+    code_bytes = await code.read()
+
+    return await _register_skill(
+        db,
+        skill_id=skill_id,
+        skill_name=skill_name,
+        version=version,
+        language=language,
+        code_bytes=code_bytes,
+        description=description,
+        dependencies=dependencies_parsed,
+        input_schema=input_schema_parsed,
+        output_schema=output_schema_parsed,
+        timeout=timeout,
+        memoizable=memoizable,
+        author=author,
+        license=license,
+        category=category
+    )
+
+
+@router.post(
+    "/register/presign",
+    summary="获取代码直传 URL",
+    description="生成 MinIO 预签名 PUT URL，客户端直传代码后调用 /register/confirm 完成注册"
+)
+async def presign_register(
+    skill_id: str,
+    version: str,
+    api_key: str = Depends(verify_api_key)
+) -> Dict[str, Any]:
+    """
+    生成代码直传的预签名 URL
+
+    大代码包不再经应用服务器转发：客户端拿到 URL 后把原始字节
+    直接 PUT 到 MinIO，省掉 Base64 和应用层的一整跳。
+    """
+    try:
+        url = await asyncio.to_thread(
+            storage_client.presign_upload, skill_id, version
+        )
+    except Exception as e:
+        logger.error("生成预签名 URL 失败: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+    return {
+        "status": "success",
+        "url": url,
+        "code_url": storage_client.object_url(skill_id, version)
+    }
+
+
+@router.post(
+    "/register/confirm",
+    response_model=SkillRegistrationResponse,
+    summary="确认注册 Skill",
+    description="代码经预签名 URL 直传后，校验对象存在并写入注册记录"
+)
+async def confirm_register(
+    request: SkillRegistrationConfirmRequest,
+    db: AsyncSession = Depends(get_db),
+    api_key: str = Depends(verify_api_key)
+) -> SkillRegistrationResponse:
+    """
+    Skill 注册确认端点
+
+    与 /register 的区别：代码已由客户端直传到存储，
+    这里只校验对象存在并落库。
+
+    Args:
+        request: Skill 注册确认请求
+        db: 数据库会话
+        api_key: API 密钥
+
+    Returns:
+        Skill 注册响应
+    """
+    try:
+        # 1. 预编译输入/输出 Schema（与 /register 相同的前置校验）
+        try:
+            if request.input_schema:
+                get_validator(request.input_schema)
+            if request.output_schema:
+                get_validator(request.output_schema)
+        except SchemaDefinitionError as e:
+            logger.error("Schema 定义无效: %s", e)
             return SkillRegistrationResponse(
                 status="error",
-                message=f"Skill 已存在: {request.skill_id}",
+                message="Schema 定义无效",
                 error={
-                    "code": "SKILL_REG_001",
-                    "details": "Skill ID 已被使用"
+                    "code": "SKILL_REG_004",
+                    "details": str(e)
                 }
             )
 
-        # 2. 解码 Base64 代码
+        # 2. 校验代码对象已直传到位（stat，不取回内容）
         try:
-            code_bytes = base64.b64decode(request.code)
-            code_str = code_bytes.decode('utf-8')
-            logger.info(f"代码解码成功: {len(code_str)} 字符")
+            await asyncio.to_thread(
+                storage_client.stat_code, request.skill_id, request.version
+            )
         except Exception as e:
-            logger.error(f"代码解码失败: {e}")
+            logger.warning("代码对象不存在: %s - %s", request.skill_id, e)
             return SkillRegistrationResponse(
                 status="error",
-                message="代码格式无效",
+                message="代码对象不存在",
                 error={
-                    "code": "SKILL_REG_003",
-                    "details": "Base64 解码失败"
+                    "code": "SKILL_REG_005",
+                    "details": "未找到已上传的代码对象，请先通过预签名 URL 上传"
                 }
             )
 
-        # 3. 上传代码到 MinIO
-        try:
-            code_url = storage_client.upload_code(
+        code_url = storage_client.object_url(request.skill_id, request.version)
+
+        # 3. 单语句落库（与 /register 相同的去重插入）
+        insert_result = await db.execute(
+            pg_insert(Skill)
+            .values(
                 skill_id=request.skill_id,
+                skill_name=request.skill_name,
+                description=request.description,
                 version=request.version,
-                code_b64=request.code
+                language=request.language.value,
+                code_url=code_url,
+                dependencies=request.dependencies,
+                input_schema=request.input_schema,
+                output_schema=request.output_schema,
+                timeout=request.timeout,
+                memoizable=request.memoizable,
+                author=request.author,
+                license=request.license,
+                category=request.category
             )
-            logger.info(f"代码上传成功: {code_url}")
-        except Exception as e:
-            logger.error(f"代码上传失败: {e}")
+            .on_conflict_do_nothing(index_elements=["skill_id"])
+            .returning(Skill.id, Skill.created_at)
+        )
+        inserted = insert_result.one_or_none()
+
+        if inserted is None:
+            logger.warning("Skill 已存在: %s", request.skill_id)
             return SkillRegistrationResponse(
                 status="error",
-                message="代码上传失败",
+                message=f"Skill 已存在: {request.skill_id}",
                 error={
-                    "code": "SKILL_REG_999",
-                    "details": str(e)
+                    "code": "SKILL_REG_001",
+                    "details": "Skill ID 已被使用"
                 }
             )
 
-        # 4. 创建 Skill 记录
-        from datetime import datetime
+        skill_pk, created_at = inserted
 
-        skill = Skill(
-            skill_id=request.skill_id,
-            skill_name=request.skill_name,
-            description=request.description,
-            version=request.version,
-            language=request.language.value,
-            code_url=code_url,
-            dependencies=request.dependencies,
-            input_schema=request.input_schema,
-            output_schema=request.output_schema,
-            timeout=request.timeout,
-            author=request.author,
-            license=request.license,
-            category=request.category
-        )
-
-        # 5. 创建 Skill 版本记录
-        skill_version = SkillVersion(
-            skill_id=request.skill_id,
-            version=request.version,
-            code_url=code_url,
-            dependencies=request.dependencies,
-            input_schema=request.input_schema,
-            output_schema=request.output_schema
+        # 4. 创建 Skill 版本记录
+        await db.execute(
+            insert(SkillVersion).values(
+                skill_pk=skill_pk,
+                skill_id=request.skill_id,
+                version=request.version,
+                code_url=code_url,
+                dependencies=request.dependencies,
+                input_schema=request.input_schema,
+                output_schema=request.output_schema
+            )
         )
 
-        # 6. 保存到数据库
-        db.add(skill)
-        db.add(skill_version)
-        await db.commit()
-        await db.refresh(skill)
+        # 新分类/语言可能出现，使列表缓存失效；Skill 缓存同步失效
+        invalidate_listing_cache()
+        invalidate_skill(request.skill_id)
 
-        logger.info(f"Skill 注册成功: {request.skill_id} v{request.version}")
+        logger.info("Skill 注册成功（直传确认）: %s v%s", request.skill_id, request.version)
 
         return SkillRegistrationResponse(
             status="success",
-            skill_id=skill.skill_id,
-            version=skill.version,
-            registration_time=skill.created_at.isoformat(),
+            skill_id=request.skill_id,
+            version=request.version,
+            registration_time=created_at.isoformat(),
             message="Skill 注册成功"
         )
 
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Skill 注册失败: {e}")
+        logger.error("Skill 注册确认失败: %s", e)
         await db.rollback()
-
-        # 清理已上传的代码
-        try:
-            storage_client.delete_code(request.skill_id, request.version)
-        except:
-            pass
-
         return SkillRegistrationResponse(
             status="error",
             message="注册失败",
@@ -192,13 +590,19 @@ async def delete_skill(
 ):
     """删除 Skill"""
     try:
-        # 查找 Skill
-        result = await db.execute(
-            select(Skill).where(Skill.skill_id == skill_id)
-        )
-        skill = result.scalar_one_or_none()
+        # 查找 Skill：先经进程内缓存解析出主键（热门 Skill 免查询），
+        # 再按主键取会话内实例——主键访问可命中身份映射
+        cached = await get_skill(skill_id, db)
+        if not cached:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Skill 不存在"
+            )
 
+        skill = await db.get(Skill, cached.id)
         if not skill:
+            # 缓存项已过时（他处刚删除）
+            invalidate_skill(skill_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Skill 不存在"
@@ -206,12 +610,16 @@ async def delete_skill(
 
         # 删除数据库记录
         await db.delete(skill)
-        await db.commit()
+        await db.flush()
+
+        # 删除存储的代码（阻塞的存储调用进线程池，不卡事件循环）
+        await asyncio.to_thread(storage_client.delete_code, skill_id, skill.version)
 
-        # 删除存储的代码
-        storage_client.delete_code(skill_id, skill.version)
+        # 分类/语言集合可能收缩，使列表缓存失效；Skill 缓存同步失效
+        invalidate_listing_cache()
+        invalidate_skill(skill_id)
 
-        logger.info(f"Skill 删除成功: {skill_id}")
+        logger.info("Skill 删除成功: %s", skill_id)
 
         return {
             "status": "success",
@@ -221,7 +629,7 @@ async def delete_skill(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Skill 删除失败: {e}")
+        logger.error("Skill 删除失败: %s", e)
         await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,11 +1,16 @@
 """
 Skill Runtime Engine (Docker Sandbox)
 """
+import io
+import orjson
 import logging
 import base64
 import docker
 import asyncio
+import tarfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Dict, Any, Optional
 try:
     from docker.errors import DockerException, ContainerError, ImageNotFound
@@ -43,6 +48,22 @@ class RuntimeEngine:
         if not lazy_init:
             self._init_client()
 
+        # Docker SDK 是同步阻塞的；用专用线程池承载容器操作，
+        # 避免冷镜像拉取等慢调用挤占默认线程池（事件循环共享）
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.MAX_PARALLEL_STEPS * 2,
+            thread_name_prefix="docker-io"
+        )
+
+        # 每种语言的常驻容器池：容器启动一次后复用，
+        # 执行走 exec，免去每次调用的命名空间/cgroup/OverlayFS 冷启动
+        self._warm_pool: Dict[SkillLanguage, asyncio.Queue] = {}
+        self._warm_languages = (SkillLanguage.PYTHON,)
+
+        # 已确认本地存在的镜像：稳态下跳过每次执行前的
+        # images.get 探测（一次 Docker API 往返）
+        self._ready_images: set = set()
+
         # 语言特定的 Docker 镜像
         self.language_images = {
             SkillLanguage.PYTHON: "python:3.11-slim",
@@ -57,6 +78,119 @@ class RuntimeEngine:
         if self.client is None:
             self.client = docker.from_env()
 
+    async def _run_blocking(self, fn, *args, **kwargs):
+        """在专用线程池中执行阻塞的 Docker SDK 调用"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, partial(fn, *args, **kwargs)
+        )
+
+    def _ensure_image(self, image: str):
+        """确保镜像就绪（稳态下零 API 往返）"""
+        if image in self._ready_images:
+            return
+        try:
+            self.client.images.get(image)
+        except ImageNotFound:
+            logger.info("拉取镜像: %s", image)
+            self.client.images.pull(image)
+        self._ready_images.add(image)
+
+    def _create_warm_container(self, language: SkillLanguage):
+        """创建一个常驻容器（tail 保活，执行走 exec）"""
+        image = self.language_images[language]
+        self._ensure_image(image)
+        return self.client.containers.run(
+            image=image,
+            name=f"skill_warm_{language.value}_{uuid.uuid4().hex[:8]}",
+            command=["tail", "-f", "/dev/null"],
+            detach=True,
+            mem_limit="512m",
+            cpu_shares=512,
+            network_disabled=True,
+            # /app 挂 tmpfs：代码/输入投递是纯内存写，不落 OverlayFS
+            tmpfs={"/app": "size=16m,mode=1777"},
+            environment={
+                "WISHUB_SKILL": "true"
+            }
+        )
+
+    async def warm_up(self):
+        """预热常驻容器池（尽力而为，失败不影响启动）"""
+        try:
+            self._init_client()
+        except Exception as e:
+            logger.warning("Docker 不可用，跳过容器预热: %s", e)
+            return
+
+        for language in self._warm_languages:
+            queue = self._warm_pool.setdefault(
+                language, asyncio.Queue(maxsize=settings.WARM_POOL_SIZE)
+            )
+            while queue.qsize() < settings.WARM_POOL_SIZE:
+                try:
+                    container = await self._run_blocking(
+                        self._create_warm_container, language
+                    )
+                    queue.put_nowait(container)
+                except Exception as e:
+                    logger.warning("预热容器失败: %s - %s", language.value, e)
+                    break
+            logger.info("容器池预热完成: %s x%s", language.value, queue.qsize())
+
+    async def shutdown_warm_pool(self):
+        """关闭时清理所有常驻容器"""
+        for queue in self._warm_pool.values():
+            while not queue.empty():
+                container = queue.get_nowait()
+                try:
+                    await self._run_blocking(container.remove, force=True)
+                except Exception:
+                    pass
+        self._warm_pool.clear()
+
+    async def _acquire_warm_container(self, language: SkillLanguage):
+        """从池中取一个常驻容器，池空或未预热返回 None（退回冷启动路径）"""
+        queue = self._warm_pool.get(language)
+        if queue is None:
+            return None
+        try:
+            return queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def _release_warm_container(self, language: SkillLanguage, container):
+        """把常驻容器放回池中；池满或容器异常时直接销毁"""
+        queue = self._warm_pool.get(language)
+        if queue is not None:
+            try:
+                queue.put_nowait(container)
+                return
+            except asyncio.QueueFull:
+                pass
+        try:
+            await self._run_blocking(container.remove, force=True)
+        except Exception:
+            pass
+
+    def _exec_in_container(
+        self,
+        container,
+        command: list,
+        payload_tar: bytes
+    ) -> Dict[str, Any]:
+        """在常驻容器内执行命令（跳过容器创建/销毁）"""
+        self._put_payload(container, payload_tar)
+        exit_code, output = container.exec_run(
+            cmd=command,
+            stdout=True,
+            stderr=True
+        )
+        return {
+            "stdout": output.decode('utf-8'),
+            "exit_code": exit_code
+        }
+
     async def execute_skill(
         self,
         skill: Skill,
@@ -77,36 +211,58 @@ class RuntimeEngine:
         task_id = str(uuid.uuid4())
         container_name = f"skill_{skill.skill_id}_{task_id[:8]}"
 
-        logger.info(
-            f"准备执行 Skill: {skill.skill_id} (语言: {skill.language}, "
-            f"容器: {container_name})"
+        logger.debug(
+            "准备执行 Skill: %s (语言: %s, 容器: %s)",
+            skill.skill_id, skill.language, container_name
         )
 
         try:
             # 1. 下载并解码代码
             code = await self._download_code(skill.code_url)
 
-            # 2. 准备执行命令
-            command = self._build_command(skill.language, inputs)
+            # 2. 准备执行命令与输入负载：输入以 tar 包投递为
+            # /app/inputs.json，不再拼进命令行——既消除命令注入面，
+            # 也不受 ARG_MAX 限制
+            command = self._build_command(skill.language)
+            # orjson 直接产出 bytes，序列化更快且原生支持 datetime/UUID
+            inputs_json = orjson.dumps(inputs)
+            payload_tar = self._build_payload_archive(
+                inputs_json, code, skill.language
+            )
 
             # 3. 启动容器
             image = self.language_images.get(skill.language)
             if not image:
                 raise ValueError(f"不支持的语言: {skill.language}")
 
-            logger.info(f"使用镜像: {image}")
-
-            # 4. 执行（在单独的线程中运行以支持超时）
-            result = await asyncio.to_thread(
-                self._run_container,
-                container_name,
-                image,
-                code,
-                command,
-                timeout
-            )
-
-            logger.info(f"Skill 执行成功: {skill.skill_id}")
+            logger.debug("使用镜像: %s", image)
+
+            # 4. 执行：优先用常驻容器 exec（无冷启动），
+            # 池空时退回冷启动路径（专用线程池，不占用默认线程池）
+            warm_container = await self._acquire_warm_container(skill.language)
+            if warm_container is not None:
+                try:
+                    result = await self._run_blocking(
+                        self._exec_in_container,
+                        warm_container,
+                        command,
+                        payload_tar
+                    )
+                finally:
+                    await self._release_warm_container(
+                        skill.language, warm_container
+                    )
+            else:
+                result = await self._run_blocking(
+                    self._run_container,
+                    container_name,
+                    image,
+                    command,
+                    payload_tar,
+                    timeout
+                )
+
+            logger.debug("Skill 执行成功: %s", skill.skill_id)
 
             return {
                 "task_id": task_id,
@@ -116,14 +272,14 @@ class RuntimeEngine:
             }
 
         except ContainerError as e:
-            logger.error(f"容器执行错误: {e}")
+            logger.error("容器执行错误: %s", e)
             return {
                 "task_id": task_id,
                 "status": "error",
                 "error": str(e)
             }
         except asyncio.TimeoutError:
-            logger.warning(f"执行超时: {skill.skill_id}")
+            logger.warning("执行超时: %s", skill.skill_id)
             await self._cleanup_container(container_name)
             return {
                 "task_id": task_id,
@@ -131,7 +287,7 @@ class RuntimeEngine:
                 "error": f"执行超时（{timeout}秒）"
             }
         except Exception as e:
-            logger.error(f"执行失败: {e}")
+            logger.error("执行失败: %s", e)
             return {
                 "task_id": task_id,
                 "status": "error",
@@ -156,129 +312,187 @@ class RuntimeEngine:
         logger.warning("MinIO 集成待实现，使用本地代码")
         return ""
 
-    def _build_command(self, language: SkillLanguage, inputs: Dict[str, Any]) -> list:
+    def _build_command(self, language: SkillLanguage) -> list:
         """
         构建执行命令
 
+        输入不再拼进命令行，统一从容器内的 /app/inputs.json 读取。
+
         Args:
             language: 编程语言
-            inputs: 输入参数
 
         Returns:
             命令列表
         """
-        import json
-
         if language == SkillLanguage.PYTHON:
-            # Python: 将输入作为 JSON 参数传递
-            inputs_json = json.dumps(inputs)
             return [
                 "python",
                 "-c",
-                f"import sys, json; inputs = json.loads('{inputs_json}'); "
-                f"exec(open('/app/skill.py').read(), globals())"
+                "import json; inputs = json.load(open('/app/inputs.json')); "
+                "exec(open('/app/skill.py').read(), globals())"
             ]
         elif language == SkillLanguage.TYPESCRIPT:
             # TypeScript: 使用 ts-node
-            inputs_json = json.dumps(inputs)
             return [
                 "npx",
                 "-y",
                 "ts-node",
                 "-e",
-                f"const inputs = JSON.parse('{inputs_json}'); "
-                f"eval(require('fs').readFileSync('/app/skill.ts', 'utf8'));"
+                "const inputs = JSON.parse("
+                "require('fs').readFileSync('/app/inputs.json', 'utf8')); "
+                "eval(require('fs').readFileSync('/app/skill.ts', 'utf8'));"
             ]
         elif language == SkillLanguage.GO:
-            # Go: 编译并运行
+            # Go: 编译并运行（inputs.json 已投递到 /app）
             return [
                 "sh",
                 "-c",
-                f"echo '{json.dumps(inputs)}' > /app/inputs.json && "
-                f"go run /app/skill.go"
+                "go run /app/skill.go"
             ]
         else:
             raise ValueError(f"不支持的语言: {language}")
 
+    # 各语言在容器内的代码文件名
+    _CODE_FILENAMES = {
+        SkillLanguage.PYTHON: "skill.py",
+        SkillLanguage.TYPESCRIPT: "skill.ts",
+        SkillLanguage.GO: "skill.go",
+    }
+
+    def _build_payload_archive(
+        self,
+        inputs_json: bytes,
+        code: str,
+        language: SkillLanguage
+    ) -> bytes:
+        """
+        把输入与代码打成一个内存 tar 包（解包后展开为 /app/*）
+
+        Args:
+            inputs_json: JSON 编码的输入字节
+            code: 代码内容（为空则只投递输入）
+            language: 编程语言（决定代码文件名）
+
+        Returns:
+            tar 包字节
+        """
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            info = tarfile.TarInfo(name="app/inputs.json")
+            info.size = len(inputs_json)
+            tar.addfile(info, io.BytesIO(inputs_json))
+            if code:
+                code_bytes = code.encode('utf-8')
+                code_info = tarfile.TarInfo(
+                    name=f"app/{self._CODE_FILENAMES.get(language, 'skill.py')}"
+                )
+                code_info.size = len(code_bytes)
+                tar.addfile(code_info, io.BytesIO(code_bytes))
+        return buf.getvalue()
+
+    def _put_payload(self, container, payload_tar: bytes):
+        """以根为目标解包内存 tar，app/ 目录不存在时一并创建；
+        常驻容器的 /app 挂着 tmpfs，写入即是纯内存拷贝"""
+        container.put_archive("/", payload_tar)
+
     def _run_container(
         self,
         container_name: str,
         image: str,
-        code: str,
         command: list,
+        payload_tar: bytes,
         timeout: int
     ) -> Dict[str, Any]:
         """
-        运行容器
+        运行容器（冷启动路径）
+
+        冷启动容器不挂 tmpfs：负载要在启动前投递，
+        而 tmpfs 挂载发生在启动时，会把先写入的文件遮住。
 
         Args:
             container_name: 容器名称
             image: 镜像名称
-            code: 代码内容
             command: 执行命令
+            payload_tar: 输入与代码的内存 tar 包
             timeout: 超时时间
 
         Returns:
             执行结果
         """
+        create_kwargs = dict(
+            image=image,
+            name=container_name,
+            command=command,
+            mem_limit="512m",
+            cpu_shares=512,
+            network_disabled=True,  # 禁用网络以提高安全性
+            environment={
+                "WISHUB_SKILL": "true"
+            }
+        )
+
+        container = None
         try:
-            # 拉取镜像（如果不存在）
+            # 确保镜像存在；已确认就绪的镜像跳过 images.get 探测
+            self._ensure_image(image)
+
+            # 先创建再启动：输入要在启动前投递进容器
             try:
-                self.client.images.get(image)
+                container = self.client.containers.create(**create_kwargs)
             except ImageNotFound:
-                logger.info(f"拉取镜像: {image}")
-                self.client.images.pull(image)
-
-            # 创建并启动容器
-            container = self.client.containers.run(
-                image=image,
-                name=container_name,
-                command=command,
-                detach=False,
-                remove=False,
-                mem_limit="512m",
-                cpu_shares=512,
-                network_disabled=True,  # 禁用网络以提高安全性
-                environment={
-                    "WISHUB_SKILL": "true"
-                }
-            )
+                # 镜像在探测后被外部删除：重新拉取并重试一次
+                self._ready_images.discard(image)
+                self._ensure_image(image)
+                container = self.client.containers.create(**create_kwargs)
+
+            self._put_payload(container, payload_tar)
+            container.start()
+            state = container.wait(timeout=timeout)
 
             # 获取输出
             logs = container.logs(stdout=True, stderr=True).decode('utf-8')
 
             return {
                 "stdout": logs,
-                "exit_code": container.attrs['State']['ExitCode']
+                "exit_code": state.get("StatusCode", -1)
             }
 
         finally:
             # 确保容器被清理
             try:
-                container = self.client.containers.get(container_name)
-                container.remove(force=True)
+                if container is not None:
+                    container.remove(force=True)
             except:
                 pass
 
     async def _cleanup_container(self, container_name: str):
         """清理容器"""
+        def _remove():
+            # 查找和删除都是阻塞调用，整体放进线程池
+            self.client.containers.get(container_name).remove(force=True)
+
         try:
-            await asyncio.to_thread(
-                self.client.containers.get(container_name).remove,
-                force=True
-            )
+            await self._run_blocking(_remove)
         except:
             pass
 
     async def health_check(self) -> bool:
         """检查运行时引擎健康状态"""
         try:
-            self.client.ping()
+            self._init_client()
+            # ping 是阻塞的 HTTP 往返，不能直接在事件循环里调
+            await self._run_blocking(self.client.ping)
             return True
-        except DockerException as e:
-            logger.error(f"Docker 健康检查失败: {e}")
+        except Exception as e:
+            logger.error("Docker 健康检查失败: %s", e)
             return False
 
 
 # 全局运行时引擎实例（延迟初始化）
 runtime_engine = RuntimeEngine(lazy_init=True)
+
+
+def get_docker_client():
+    """获取进程级 Docker 客户端单例（首次调用时初始化）"""
+    runtime_engine._init_client()
+    return runtime_engine.client
@@ -0,0 +1,21 @@
+"""
+Search Client (Elasticsearch)
+"""
+import logging
+from functools import lru_cache
+
+from elasticsearch import Elasticsearch
+
+from wishub_skill.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache
+def get_es_client() -> Elasticsearch:
+    """
+    获取进程级 Elasticsearch 客户端单例
+
+    客户端内部维护 HTTP 连接池，进程内复用同一个实例即可。
+    """
+    return Elasticsearch(f"http://{settings.ES_HOST}")
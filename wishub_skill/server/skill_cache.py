@@ -0,0 +1,130 @@
+"""
+Skill Metadata Cache (进程内 TTL)
+"""
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import select, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+
+from wishub_skill.server.database import Skill
+
+logger = logging.getLogger(__name__)
+
+# Skill 元数据很少变化（注册/删除时才变），短 TTL 进程内缓存
+# 即可消除热门 Skill 每次调用的 SELECT
+_TTL_SECONDS = 30.0
+# 缓存条目上限：防止海量一次性 skill_id 查询把进程内存撑大
+_MAX_ENTRIES = 4096
+_cache: Dict[str, Tuple[float, Skill]] = {}
+
+# 调用路径用到的列（与 invoke 的 load_only 保持一致）
+_INVOKE_COLUMNS = (
+    Skill.id,
+    Skill.skill_id,
+    Skill.version,
+    Skill.language,
+    Skill.code_url,
+    Skill.input_schema,
+    Skill.timeout,
+    Skill.memoizable,
+)
+
+# 模块级预构建查询：select 只编译一次，配合 asyncpg 的
+# 预编译语句缓存复用服务端执行计划
+_SKILL_BY_ID = (
+    select(Skill)
+    .options(load_only(*_INVOKE_COLUMNS))
+    .where(Skill.skill_id == bindparam("skill_id"))
+)
+
+
+def _store_skill(skill_id: str, skill: Skill, now: float) -> None:
+    """写入缓存；到达上限时先清过期项，仍满则淘汰最早写入的条目"""
+    if len(_cache) >= _MAX_ENTRIES and skill_id not in _cache:
+        for key in [
+            k for k, (ts, _) in _cache.items() if now - ts >= _TTL_SECONDS
+        ]:
+            _cache.pop(key, None)
+        while len(_cache) >= _MAX_ENTRIES:
+            _cache.pop(next(iter(_cache)))
+    _cache[skill_id] = (now, skill)
+
+
+def peek_skill(skill_id: str) -> Optional[Skill]:
+    """只查缓存不回源，过期或不存在返回 None"""
+    entry = _cache.get(skill_id)
+    if entry and time.monotonic() - entry[0] < _TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+async def get_skill(skill_id: str, db: AsyncSession) -> Optional[Skill]:
+    """
+    获取 Skill（优先命中进程内缓存）
+
+    缓存的实例已从会话中脱离（expunge），只做只读访问，
+    不会被后续的 commit/rollback 影响。
+
+    Args:
+        skill_id: Skill ID
+        db: 数据库会话（缓存未命中时回源）
+
+    Returns:
+        Skill 实例，不存在返回 None
+    """
+    cached = peek_skill(skill_id)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(_SKILL_BY_ID, {"skill_id": skill_id})
+    skill = result.scalar_one_or_none()
+
+    if skill is not None:
+        # 脱离会话后实例可安全地跨请求复用（expire_on_commit=False）
+        db.expunge(skill)
+        _store_skill(skill_id, skill, time.monotonic())
+
+    return skill
+
+
+async def get_skills(skill_ids: Iterable[str], db: AsyncSession) -> Dict[str, Skill]:
+    """
+    批量获取 Skill（缓存命中的直接取，只为未命中的发一次 IN 查询）
+
+    Args:
+        skill_ids: Skill ID 集合
+        db: 数据库会话
+
+    Returns:
+        skill_id 到 Skill 的映射（不存在的 ID 不在结果中）
+    """
+    skill_map: Dict[str, Skill] = {}
+    missing = []
+    for skill_id in skill_ids:
+        cached = peek_skill(skill_id)
+        if cached is not None:
+            skill_map[skill_id] = cached
+        else:
+            missing.append(skill_id)
+
+    if missing:
+        result = await db.execute(
+            select(Skill)
+            .options(load_only(*_INVOKE_COLUMNS))
+            .where(Skill.skill_id.in_(missing))
+        )
+        now = time.monotonic()
+        for skill in result.scalars():
+            db.expunge(skill)
+            _store_skill(skill.skill_id, skill, now)
+            skill_map[skill.skill_id] = skill
+
+    return skill_map
+
+
+def invalidate_skill(skill_id: str) -> None:
+    """注册/删除/更新 Skill 后使对应缓存项失效"""
+    _cache.pop(skill_id, None)
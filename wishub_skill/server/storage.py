@@ -1,9 +1,11 @@
 """
 Storage Client (MinIO)
 """
+import hashlib
+import io
 import logging
-import base64
-from typing import Optional
+from datetime import timedelta
+from typing import ClassVar, Optional, Set
 from minio import Minio
 from minio.error import S3Error
 
@@ -15,6 +17,9 @@ logger = logging.getLogger(__name__)
 class StorageClient:
     """MinIO 存储客户端"""
 
+    # 进程内已确认存在的桶：每个桶只做一次 HEAD 探测
+    _buckets_verified: ClassVar[Set[str]] = set()
+
     def __init__(
         self,
         endpoint: Optional[str] = None,
@@ -53,56 +58,135 @@ class StorageClient:
             self._ensure_bucket()
 
     def _ensure_bucket(self):
-        """确保存储桶存在"""
+        """确保存储桶存在（每个桶每进程只探测一次）"""
+        if self.bucket_name in self._buckets_verified:
+            return
         try:
             if not self.client.bucket_exists(self.bucket_name):
                 self.client.make_bucket(self.bucket_name)
-                logger.info(f"已创建存储桶: {self.bucket_name}")
+                logger.info("已创建存储桶: %s", self.bucket_name)
+            self._buckets_verified.add(self.bucket_name)
         except S3Error as e:
-            logger.error(f"创建存储桶失败: {e}")
+            logger.error("创建存储桶失败: %s", e)
             raise
 
+    def _object_name(
+        self,
+        skill_id: str,
+        version: str,
+        content_hash: Optional[str] = None
+    ) -> str:
+        """构建代码对象名称（有内容哈希时按内容寻址）"""
+        if content_hash:
+            return f"{skill_id}/{version}/{content_hash[:16]}.py"
+        return f"{skill_id}/{version}/skill.py"
+
+    def object_url(
+        self,
+        skill_id: str,
+        version: str,
+        content_hash: Optional[str] = None
+    ) -> str:
+        """构建代码对象的确定性下载 URL（不触发任何存储 IO）"""
+        return (
+            f"http://{self.endpoint}/{self.bucket_name}/"
+            f"{self._object_name(skill_id, version, content_hash)}"
+        )
+
+    def presign_upload(
+        self,
+        skill_id: str,
+        version: str,
+        expires: timedelta = timedelta(minutes=10)
+    ) -> str:
+        """
+        生成代码对象的预签名 PUT URL（客户端直传，不经应用服务器）
+
+        Args:
+            skill_id: Skill ID
+            version: 版本号
+            expires: URL 有效期
+
+        Returns:
+            预签名 PUT URL
+        """
+        return self.client.presigned_put_object(
+            bucket_name=self.bucket_name,
+            object_name=self._object_name(skill_id, version),
+            expires=expires
+        )
+
+    def stat_code(self, skill_id: str, version: str):
+        """
+        校验代码对象已存在（stat 元数据，不取回内容）
+
+        Args:
+            skill_id: Skill ID
+            version: 版本号
+
+        Returns:
+            对象元数据，不存在时抛出 S3Error
+        """
+        return self.client.stat_object(
+            bucket_name=self.bucket_name,
+            object_name=self._object_name(skill_id, version)
+        )
+
     def upload_code(
         self,
         skill_id: str,
         version: str,
-        code_b64: str
+        code_bytes: bytes,
+        content_hash: Optional[str] = None
     ) -> str:
         """
-        上传代码到 MinIO
+        上传代码到 MinIO（内容寻址，相同内容不重复上传）
 
         Args:
             skill_id: Skill ID
             version: 版本号
-            code_b64: Base64 编码的代码
+            code_bytes: 已解码的代码字节（bytes/bytearray，调用方只解码一次）
+            content_hash: 代码内容的 SHA-256（未提供则在此计算）
 
         Returns:
             代码文件 URL
         """
         try:
-            # 解码 Base64
-            code_bytes = base64.b64decode(code_b64)
+            # 桶探测按进程摊销为零次
+            self._ensure_bucket()
+
+            # 对象按内容哈希命名：重复注册相同内容时 stat 即可去重
+            if content_hash is None:
+                content_hash = hashlib.sha256(code_bytes).hexdigest()
+            object_name = self._object_name(skill_id, version, content_hash)
 
-            # 构建对象名称
-            object_name = f"{skill_id}/{version}/skill.py"
+            try:
+                self.client.stat_object(
+                    bucket_name=self.bucket_name,
+                    object_name=object_name
+                )
+                logger.debug("代码对象已存在，跳过上传: %s", object_name)
+                return self.object_url(skill_id, version, content_hash)
+            except S3Error:
+                pass
 
             # 上传文件
             self.client.put_object(
                 bucket_name=self.bucket_name,
                 object_name=object_name,
-                data=code_bytes,
+                data=io.BytesIO(code_bytes),
                 length=len(code_bytes),
                 content_type="text/x-python"
             )
 
             # 构建下载 URL
-            url = f"http://{self.endpoint}/{self.bucket_name}/{object_name}"
-            logger.info(f"代码上传成功: {url}")
+            url = self.object_url(skill_id, version, content_hash)
+            logger.debug("代码上传成功: %s", url)
 
             return url
 
         except Exception as e:
-            logger.error(f"代码上传失败: {e}")
+            logger.error("代码上传失败: %s", e)
             raise RuntimeError(f"代码上传失败: {str(e)}")
 
     def download_code(self, skill_id: str, version: str) -> bytes:
@@ -117,7 +201,17 @@ class StorageClient:
             代码字节
         """
         try:
-            object_name = f"{skill_id}/{version}/skill.py"
+            # 对象可能按内容哈希命名，按前缀解析实际对象名
+            prefix = f"{skill_id}/{version}/"
+            objects = self.client.list_objects(
+                bucket_name=self.bucket_name,
+                prefix=prefix
+            )
+            object_name = next(
+                (obj.object_name for obj in objects), None
+            )
+            if object_name is None:
+                raise RuntimeError(f"代码对象不存在: {prefix}")
 
             response = self.client.get_object(
                 bucket_name=self.bucket_name,
@@ -125,12 +219,12 @@ class StorageClient:
             )
 
             code = response.read()
-            logger.info(f"代码下载成功: {skill_id}/{version}")
+            logger.debug("代码下载成功: %s/%s", skill_id, version)
 
             return code
 
         except S3Error as e:
-            logger.error(f"代码下载失败: {e}")
+            logger.error("代码下载失败: %s", e)
             raise RuntimeError(f"代码下载失败: {str(e)}")
 
     def delete_code(self, skill_id: str, version: str):
@@ -142,18 +236,27 @@ class StorageClient:
             version: 版本号
         """
         try:
-            object_name = f"{skill_id}/{version}/skill.py"
-
-            self.client.remove_object(
+            # 按前缀删除：同时覆盖内容寻址与直传（skill.py）两种命名
+            prefix = f"{skill_id}/{version}/"
+            for obj in self.client.list_objects(
                 bucket_name=self.bucket_name,
-                object_name=object_name
-            )
+                prefix=prefix
+            ):
+                self.client.remove_object(
+                    bucket_name=self.bucket_name,
+                    object_name=obj.object_name
+                )
 
-            logger.info(f"代码删除成功: {skill_id}/{version}")
+            logger.debug("代码删除成功: %s/%s", skill_id, version)
 
         except S3Error as e:
-            logger.warning(f"代码删除失败: {e}")
+            logger.warning("代码删除失败: %s", e)
 
 
 # 全局存储客户端实例（延迟初始化）
 storage_client = StorageClient(lazy_init=True)
+
+
+def get_minio_client() -> Minio:
+    """获取进程级 MinIO 客户端单例"""
+    return storage_client.client
@@ -0,0 +1,142 @@
+"""
+Async Task Pool (异步调用的后台执行)
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+
+from wishub_skill.config import settings
+from wishub_skill.server.database import Skill, SkillExecution
+from wishub_skill.server.db_session import AsyncSessionLocal
+from wishub_skill.server.runtime import runtime_engine
+
+logger = logging.getLogger(__name__)
+
+
+class TaskPool:
+    """
+    进程内异步任务池
+
+    固定数量的 worker 协程消费同一个队列，天然限制后台并发执行的
+    容器数；worker 使用独立的数据库会话，不与请求会话纠缠。
+    """
+
+    def __init__(self, worker_count: Optional[int] = None):
+        self.worker_count = worker_count or settings.TASK_POOL_WORKERS
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """启动 worker 协程（在事件循环内调用）"""
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.worker_count * 100)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"task-pool-{i}")
+            for i in range(self.worker_count)
+        ]
+        logger.info("任务池已启动: %s 个 worker", self.worker_count)
+
+    async def stop(self) -> None:
+        """等待队列排空后停止所有 worker"""
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._queue = None
+        self._workers = []
+        logger.info("任务池已停止")
+
+    async def submit(
+        self,
+        task_id: str,
+        skill_id: str,
+        inputs: Optional[Dict[str, Any]],
+        timeout: Optional[int]
+    ) -> bool:
+        """
+        提交异步任务
+
+        Returns:
+            任务池未启动时返回 False，由调用方决定降级行为
+        """
+        if self._queue is None:
+            return False
+        await self._queue.put((task_id, skill_id, inputs, timeout))
+        return True
+
+    async def _worker(self) -> None:
+        """消费队列并执行任务"""
+        while True:
+            task = await self._queue.get()
+            try:
+                await self._run_task(*task)
+            except Exception as e:
+                logger.error("后台任务执行异常: %s - %s", task[0], e)
+            finally:
+                self._queue.task_done()
+
+    async def _run_task(
+        self,
+        task_id: str,
+        skill_id: str,
+        inputs: Optional[Dict[str, Any]],
+        timeout: Optional[int]
+    ) -> None:
+        """执行单个异步任务并更新执行记录"""
+        async with AsyncSessionLocal() as session:
+            execution = (await session.execute(
+                select(SkillExecution).where(SkillExecution.task_id == task_id)
+            )).scalar_one_or_none()
+            skill = (await session.execute(
+                select(Skill).where(Skill.skill_id == skill_id)
+            )).scalar_one_or_none()
+
+            if not execution or not skill:
+                logger.warning("后台任务记录缺失: %s", task_id)
+                return
+
+            start_time = datetime.utcnow()
+            execution.status = "running"
+            execution.started_at = start_time
+            await session.commit()
+
+            try:
+                result = await runtime_engine.execute_skill(
+                    skill=skill,
+                    inputs=inputs,
+                    timeout=timeout or skill.timeout
+                )
+            except Exception as e:
+                execution.status = "error"
+                execution.error_message = str(e)
+                execution.completed_at = datetime.utcnow()
+                await session.commit()
+                return
+
+            end_time = datetime.utcnow()
+            if result["status"] == "success":
+                execution.status = "success"
+                execution.outputs = result.get("outputs")
+            elif result["status"] == "timeout":
+                execution.status = "timeout"
+                execution.error_message = result.get("error")
+            else:
+                execution.status = "error"
+                execution.error_message = result.get("error")
+
+            execution.execution_time = (end_time - start_time).total_seconds()
+            execution.completed_at = end_time
+            execution.container_id = result.get("container_id")
+            await session.commit()
+
+            logger.debug("后台任务完成: %s (状态: %s)", task_id, execution.status)
+
+
+# 全局任务池实例（lifespan 中启动/停止）
+task_pool = TaskPool()